@@ -0,0 +1,43 @@
+# guardar como almacen.py
+# Almacenamiento columnar opcional (Parquet/Feather, requiere pyarrow) para los CSV de clima.
+# Columnas float32 y timestamp como tipo fecha nativo; en Parquet cada grupo de filas es ~1 mes,
+# así que leer un periodo sólo descomprime los grupos que lo tocan. Feather se escribe en lotes del
+# mismo tamaño para que iter_weather (features.py) lo recorra por bloques.
+# Uso: python almacen.py weather_2020-01-01_to_2025-11-10.csv [--formato parquet|feather]
+import os, argparse, numpy as np, pandas as pd
+from features import end_bound, in_range
+
+ROW_GROUP = 24*31   # horas por grupo de filas en Parquet
+
+def to_columnar(df, path):
+    """Escribe df (con columna timestamp) en .parquet o .feather con floats de 32 bits."""
+    df = df.assign(timestamp=pd.to_datetime(df["timestamp"])).sort_values("timestamp", ignore_index=True)
+    df = df.astype({c: np.float32 for c in df.columns if c != "timestamp"})
+    if path.endswith(".parquet"): df.to_parquet(path, index=False, row_group_size=ROW_GROUP)
+    elif path.endswith(".feather"): df.to_feather(path, chunksize=ROW_GROUP)
+    else: raise ValueError(f"Formato no soportado: {path}")
+    return path
+
+def read_columnar(path, start=None, end=None, columns=None):
+    """
+    Lee sólo `columns` (más timestamp) en [start, end]. En Parquet el filtro se empuja al lector
+    (se saltan grupos de filas completos); Feather no tiene estadísticas y filtra después de leer.
+    """
+    cols = None if columns is None else ["timestamp"] + [c for c in columns if c != "timestamp"]
+    flt = [("timestamp", ">=", pd.Timestamp(start))] if start is not None else []
+    if end is not None:
+        t, inclusive = end_bound(end)   # "hasta 2024-05-31" incluye todo ese día
+        flt.append(("timestamp", "<=" if inclusive else "<", t))
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=cols, filters=flt or None)
+    df = pd.read_feather(path, columns=cols)
+    return df[in_range(df["timestamp"], start, end)].reset_index(drop=True)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", nargs="+")
+    ap.add_argument("--formato", choices=["parquet","feather"], default="parquet")
+    a = ap.parse_args()
+    for p in a.csv:
+        out = to_columnar(pd.read_csv(p), os.path.splitext(p)[0] + "." + a.formato)
+        print(f"Archivo guardado: {out} ({os.path.getsize(out)/1e6:.1f} MB, CSV {os.path.getsize(p)/1e6:.1f} MB)")
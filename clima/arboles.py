@@ -0,0 +1,122 @@
+# guardar como arboles.py
+# Exporta un GradientBoostingRegressor a arreglos NumPy planos y los evalúa sin scikit-learn.
+# Cada árbol se completa hasta la profundidad máxima D como árbol binario en arreglo (hijos de h en
+# 2h+1 y 2h+2), así bajar un nivel es aritmética y no hay que leer punteros a hijos. Las hojas que
+# quedan arriba de D se vuelven nodos de paso (umbral +inf, siempre a la izquierda). En el artefacto
+# quedan como arboles/<nombre>/*.npy (punto y cada cuantil) y se abren con mmap:
+#   feature, threshold   (árboles * (2**D - 1),) columna y umbral de cada nodo interno
+#   value                (árboles * 2**D,) salida de cada hoja ya multiplicada por learning_rate
+#   meta.json            base (init), D y número de árboles
+# Uso:
+#   python arboles.py exportar modelo_temp        agrega arboles/ a un artefacto ya entrenado
+#   python arboles.py comparar modelo_temp X.npy  diferencia máxima contra el predict de scikit-learn
+# Este módulo sólo importa NumPy: cargar y predecir no necesita sklearn, joblib ni pandas.
+import os, sys, json, shutil, numpy as np
+
+FILES = ("feature", "threshold", "value")
+MAX_DEPTH = 16   # 2**D hojas por árbol: para árboles más profundos conviene seguir con scikit-learn
+
+def flatten(m):
+    """Arreglos planos (dict) de un GradientBoostingRegressor ajustado."""
+    trees = [e.tree_ for e in m.estimators_[:, 0]]
+    D = max(t.max_depth for t in trees)
+    if D > MAX_DEPTH: raise ValueError(f"Árboles de profundidad {D}; el formato plano admite hasta {MAX_DEPTH}.")
+    I = 2**D - 1
+    feature, threshold = np.zeros((len(trees), I), np.int32), np.full((len(trees), I), np.inf)
+    value = np.zeros((len(trees), I + 1))
+    for k, t in enumerate(trees):
+        stack = [(0, 0, 0)]                   # (nodo de sklearn, posición en el arreglo, nivel)
+        while stack:
+            n, h, d = stack.pop()
+            if d == D: value[k, h - I] = t.value[n, 0, 0] * m.learning_rate
+            elif t.children_left[n] == -1: stack.append((n, 2*h + 1, d + 1))
+            else:
+                feature[k, h], threshold[k, h] = t.feature[n], t.threshold[n]
+                stack += [(t.children_left[n], 2*h + 1, d + 1), (t.children_right[n], 2*h + 2, d + 1)]
+    return {"feature": feature.ravel(), "threshold": threshold.ravel(), "value": value.ravel(),
+            "init": init_value(m),
+            "depth": int(D), "n_trees": len(trees)}
+
+def init_value(m):
+    """Predicción inicial (constante) del GBR a partir del estimador init_ ajustado."""
+    if isinstance(m.init_, str) and m.init_ == "zero": return 0.0
+    if type(m.init_).__name__ != "DummyRegressor":
+        raise ValueError(f"init={type(m.init_).__name__} depende de X; el formato plano sólo admite init constante.")
+    return float(np.ravel(m.init_.predict(np.zeros((1, m.n_features_in_))))[0])
+
+def export(m, path):
+    """Escribe los arreglos de m en el directorio path (reemplazo atómico del directorio completo)."""
+    arr = flatten(m)
+    tmp = path + ".tmp"
+    os.makedirs(tmp, exist_ok=True)
+    for k in FILES: np.save(os.path.join(tmp, k + ".npy"), arr[k])
+    json.dump({k: arr[k] for k in ("init", "depth", "n_trees")}, open(os.path.join(tmp, "meta.json"), "w"))
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+    return path
+
+class Forest:
+    """Evaluador vectorizado: todas las filas avanzan un nivel en todos los árboles a la vez."""
+    def __init__(self, path, mmap=True):
+        meta = json.load(open(os.path.join(path, "meta.json")))
+        self.init, self.depth, self.n_trees = meta["init"], meta["depth"], meta["n_trees"]
+        for k in FILES: setattr(self, k, np.load(os.path.join(path, k + ".npy"), mmap_mode="r" if mmap else None))
+
+    def predict(self, X, rows=512):
+        # scikit-learn compara X en float32 contra umbrales float64; se replica para obtener las mismas hojas
+        X = np.asarray(X, dtype=np.float32)
+        I, nc = 2**self.depth - 1, X.shape[1]
+        off, offv = np.arange(self.n_trees) * I, np.arange(self.n_trees) * (I + 1) - I
+        out = np.empty(len(X))
+        for s in range(0, len(X), rows):          # bloques de filas: memoria (rows, árboles) acotada
+            Xb = X[s:s+rows]
+            base = (np.arange(len(Xb)) * nc)[:, None]
+            h = np.zeros((len(Xb), self.n_trees), np.intp)
+            for _ in range(self.depth):
+                j = off + h
+                h = 2*h + 1 + (Xb.ravel()[base + self.feature[j]] > self.threshold[j])
+            out[s:s+rows] = self.init + self.value[offv + h].sum(axis=1)
+        return out
+
+def export_artifact(art_path, model, quantiles=None):
+    """
+    arboles/punto y arboles/q10... para un artefacto; devuelve None (y borra arboles/ viejos) si el modelo
+    no es GradientBoosting: HistGradientBoosting sigue prediciendo con scikit-learn.
+    """
+    d = os.path.join(art_path, "arboles")
+    shutil.rmtree(d, ignore_errors=True)
+    if not hasattr(model, "estimators_"): return None
+    os.makedirs(d)
+    export(model, os.path.join(d, "punto"))
+    for q, est in (quantiles or {}).items(): export(est, os.path.join(d, qname(q)))
+    return d
+
+def load_forests(art_path, mmap=True):
+    """(punto, {q: Forest}) de un artefacto, o (None, {}) si no tiene arboles/."""
+    d = os.path.join(art_path, "arboles")
+    if not os.path.isdir(os.path.join(d, "punto")): return None, {}
+    qs = {float(n[1:]) / 100: Forest(os.path.join(d, n), mmap) for n in os.listdir(d) if n.startswith("q")}
+    return Forest(os.path.join(d, "punto"), mmap), qs
+
+def qname(q): return f"q{int(round(q*100))}"
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("exportar", "comparar"):
+        raise SystemExit("Uso: python arboles.py exportar|comparar modelo_temp [X.npy]")
+    from modelo import load_model
+    path = sys.argv[2]
+    art = load_model(path, json.load(open(os.path.join(path, "meta.json")))["cols"])
+    if sys.argv[1] == "exportar":
+        d = export_artifact(path, art.model, art.quantiles)
+        if d is None: raise SystemExit(f"{art.meta['estimator']} no se exporta; sólo GradientBoostingRegressor.")
+        json.dump(dict(art.meta, arboles=True), open(os.path.join(path, "meta.json"), "w"), indent=2)
+        print(f"Árboles exportados en {d}/")
+    else:
+        X = np.load(sys.argv[3])
+        f, qs = load_forests(path)
+        if f is None: raise SystemExit("El artefacto no tiene arboles/; corre primero: python arboles.py exportar " + path)
+        from features import as_frame
+        F = as_frame(X, art.cols)
+        print(f"Diferencia máxima vs scikit-learn: {np.abs(f.predict(X) - art.model.predict(F)).max():.2e} °C")
+        for q, fq in sorted(qs.items()):
+            print(f"  cuantil {q:g}: {np.abs(fq.predict(X) - art.quantiles[q].predict(F)).max():.2e} °C")
@@ -0,0 +1,98 @@
+# guardar como backtest.py
+# Backtesting walk-forward (origen móvil) del modelo de temperatura; lo usa evalua_modelo.py --walk-forward.
+# La matriz de features se calcula una sola vez, se escribe a .npy y cada proceso la abre con mmap,
+# así que los folds comparten los mismos datos sin copiarlos ni recalcularlos.
+import os, tempfile, numpy as np, pandas as pd
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.ensemble import GradientBoostingRegressor
+from features import COLS, TARGET, build_features, observed, as_frame
+from modelo import Artifact, GBR_PARAMS
+from pronostico import recursive
+
+_X = _y = _ok = None
+
+def _init(d):
+    global _X, _y, _ok
+    _X, _y, _ok = (np.load(os.path.join(d, f"{k}.npy"), mmap_mode="r") for k in ("X", "y", "ok"))
+
+def shared():
+    """(X, y, ok) compartidos dentro de un proceso de shared_pool()."""
+    return _X, _y, _ok
+
+def full_matrix(df):
+    """(X, y, ok) para todas las filas de df; ok marca las filas sin NaN ni objetivo imputado (usables para fit)."""
+    X, y = build_features(df), observed(df, TARGET)
+    return X, y, ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+
+@contextmanager
+def shared_pool(X, y, ok, workers=None):
+    """ProcessPoolExecutor cuyos procesos abren X, y, ok con mmap (ver shared())."""
+    with tempfile.TemporaryDirectory() as d:
+        for k, a in (("X", X), ("y", y), ("ok", ok)): np.save(os.path.join(d, f"{k}.npy"), a)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(d,)) as ex:
+            yield ex
+
+def folds(n, initial, step, window=None):
+    """[(inicio_train, origen, fin_test)] con ventana expansiva (window=None) o móvil de `window` horas."""
+    return [(0 if window is None else max(0, o - window), o, min(o + step, n))
+            for o in range(initial, n, step)]
+
+def run_fold(job):
+    """Entrena en [lo, o) y mide a 1 hora en [o, hi) y recursivo a 1..H horas desde orígenes cada `every` h."""
+    k, lo, o, hi, params, H, every = job
+    tr = np.arange(lo, o)[_ok[lo:o]]
+    te = np.arange(o, hi)[_ok[o:hi]]
+    m = GradientBoostingRegressor(**params).fit(as_frame(_X[tr]), _y[tr])
+    e = m.predict(as_frame(_X[te])) - _y[te]
+    res = {"fold": k, "lo": lo, "o": o, "hi": hi, "n_train": len(tr), "n_test": len(te),
+           "mae": float(np.abs(e).mean()) if len(e) else np.nan,
+           "rmse": float(np.sqrt((e**2).mean())) if len(e) else np.nan,
+           "abs_h": np.zeros(H), "sq_h": np.zeros(H), "n_h": np.zeros(H, int)}
+    if H:
+        art = Artifact(None, {"cols": COLS}, m)
+        for r in range(max(o - 1, 2), hi - 1, every):     # r = última hora observada
+            rows = np.arange(r + 1, min(r + 1 + H, len(_y)))
+            Xh = _X[rows]
+            if np.isnan(Xh).any() or np.isnan(_y[r-2:r+1]).any(): continue
+            err = recursive(art, Xh, _y[r-2:r+1]) - _y[rows]
+            h = np.flatnonzero(~np.isnan(err))
+            res["abs_h"][h] += np.abs(err[h]); res["sq_h"][h] += err[h]**2; res["n_h"][h] += 1
+    return res
+
+def _fit_target(job):
+    est, cols, names, j = job
+    X, Y, _ = shared()
+    rows = ~np.isnan(X[:, cols]).any(axis=1) & ~np.isnan(Y[:, j])
+    return est.fit(as_frame(X[rows][:, cols], names), Y[rows, j])
+
+def fit_targets(jobs, X, Y, workers=None):
+    """
+    Ajusta varios estimadores en paralelo con X y Y compartidos por mmap: jobs = [(estimador, índices de
+    columnas de X, nombres, j)] y cada estimador se ajusta a Y[:, j] con sus columnas, sobre sus propias
+    filas sin NaN.
+    """
+    with shared_pool(X, Y, np.ones(len(X), bool), workers) as ex:
+        return list(ex.map(_fit_target, jobs))
+
+def walk_forward(df, initial=24*365, step=24*7, window=None, horizon=24, every=24, params=None, workers=None):
+    """
+    Devuelve (por_fold, por_horizonte) como DataFrames. df debe ser horario y ordenado (load_weather).
+    """
+    params = dict(GBR_PARAMS, **(params or {}))
+    X, y, ok = full_matrix(df)
+    jobs = [(k, lo, o, hi, params, horizon, every) for k, (lo, o, hi) in enumerate(folds(len(df), initial, step, window))]
+    if not jobs: raise ValueError(f"Sólo hay {len(df)} horas; --inicial ({initial}) deja sin folds de prueba.")
+    with shared_pool(X, y, ok, workers) as ex:
+        res = list(ex.map(run_fold, jobs))
+
+    ts = df["timestamp"].to_numpy()
+    por_fold = pd.DataFrame([{"fold": r["fold"], "train_desde": ts[r["lo"]], "origen": ts[r["o"]],
+                              "test_hasta": ts[r["hi"]-1], "n_train": r["n_train"], "n_test": r["n_test"],
+                              "mae": r["mae"], "rmse": r["rmse"]} for r in res])
+    n_h = sum(r["n_h"] for r in res)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        por_h = pd.DataFrame({"horizonte": np.arange(1, horizon+1), "n": n_h,
+                              "mae": sum(r["abs_h"] for r in res) / n_h,
+                              "rmse": np.sqrt(sum(r["sq_h"] for r in res) / n_h)})
+    return por_fold, por_h
@@ -0,0 +1,114 @@
+# guardar como benchmark.py
+# Mide cada etapa del camino de clima (lectura, features, entrenamiento, predicción) sobre datos horarios
+# sintéticos de 1, 10 y 50 años y guarda tiempos y pico de memoria en JSON. La predicción se mide por
+# prediccion.predict_many con un artefacto guardado, el mismo camino que usan prediccion.py y servidor.py.
+# Cada etapa corre una vez sin tracemalloc (tiempo) y otra con tracemalloc (pico de memoria).
+# Uso:
+#   python benchmark.py [--anios 1 10 50] [--arboles 100] [--salida bench_clima.json] [--sin-memoria]
+#   python benchmark.py --comparar bench_anterior.json     marca etapas >20% más lentas que la referencia
+import os, sys, json, time, platform, argparse, tempfile, tracemalloc, subprocess, numpy as np, pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from features import RAW, COLS, load_weather, training_matrix, as_frame
+from modelo import GBR_PARAMS, save_artifact, load_model
+from prediccion import predict_many
+from openmeteo import csv_source
+
+MEMORY = True   # --sin-memoria lo apaga (sólo tiempos, cada etapa corre una vez)
+
+def synthetic(years, seed=0):
+    """Serie horaria con ciclo anual y diario, ruido AR(1) y variables exógenas coherentes."""
+    rng = np.random.RandomState(seed)
+    t = pd.date_range("2000-01-01", periods=int(years*365.25*24), freq="h")
+    n = len(t)
+    doy, hr = t.dayofyear.to_numpy(), t.hour.to_numpy()
+    ar = np.zeros(n); e = rng.normal(0, 0.6, n)
+    for i in range(1, n): ar[i] = 0.95*ar[i-1] + e[i]
+    temp = 16 + 4*np.sin(2*np.pi*(doy-100)/365) + 6*np.sin(2*np.pi*(hr-9)/24) + ar
+    hum = np.clip(60 - 2.5*(temp-16) + rng.normal(0, 8, n), 5, 100)
+    dew = temp - (100 - hum)/5
+    df = pd.DataFrame({"timestamp": t, RAW[0]: temp.round(1), RAW[1]: hum.round(0), RAW[2]: dew.round(1),
+                       RAW[3]: (1020 + np.cumsum(rng.normal(0, 0.05, n)) % 10).round(1),
+                       RAW[4]: np.clip(50 + 40*np.sin(np.cumsum(rng.normal(0, 0.1, n))), 0, 100).round(0),
+                       RAW[5]: np.clip(900*np.sin(np.pi*(hr-6)/12), 0, None).round(0),
+                       RAW[6]: np.abs(rng.normal(6, 3, n)).round(1), RAW[7]: rng.randint(0, 360, n)})
+    return df
+
+def stage(res, name, fn):
+    """
+    Segundos de fn() sin trazar y pico de memoria (MB, asignaciones de Python/NumPy) en una segunda
+    corrida con tracemalloc: trazar cada asignación infla el tiempo, y no igual en todas las etapas.
+    """
+    t = time.perf_counter()
+    out = fn()
+    res[name] = {"s": round(time.perf_counter() - t, 4), "peak_mb": None}
+    if MEMORY:
+        tracemalloc.start()
+        fn()
+        res[name]["peak_mb"] = round(tracemalloc.get_traced_memory()[1]/1e6, 2)
+        tracemalloc.stop()
+    return out
+
+def run(years, trees, d):
+    path = os.path.join(d, f"sintetico_{years}a.csv")
+    if not os.path.exists(path):
+        synthetic(years).to_csv(path, index=False, date_format="%Y-%m-%dT%H:%M")
+    res = {"filas": None}
+    df = stage(res, "leer_csv", lambda: load_weather(path))
+    res["filas"] = len(df)
+    try:
+        import pyarrow  # noqa: F401  (Parquet es opcional)
+        from almacen import to_columnar
+        pq = to_columnar(df, path[:-4] + ".parquet")
+        stage(res, "leer_parquet", lambda: load_weather(pq))
+    except ImportError:
+        pass
+    X, y, ok = stage(res, "features", lambda: training_matrix(df))
+    m = stage(res, "entrenar", lambda: GradientBoostingRegressor(**dict(GBR_PARAMS, n_estimators=trees)).fit(as_frame(X), y))
+    # predicción como la usan prediccion.py y servidor.py: artefacto en disco (con arboles/) + predict_many
+    art_path = save_artifact(os.path.join(d, f"modelo_{years}a"), m, COLS, df[ok])
+    fetch, ts = csv_source(df), df["timestamp"].iloc[3:]
+    stage(res, "predecir_lote", lambda: predict_many(load_model(art_path), ts, fetch))
+    art = load_model(art_path)
+    stage(res, "predecir_1_hora_x200", lambda: [predict_many(art, [t], fetch) for t in ts.iloc[-200:]])
+    return res
+
+def environment():
+    import sklearn
+    try: rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError: rev = ""
+    return {"git": rev, "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+            "sklearn": sklearn.__version__, "cpu": platform.processor() or platform.machine()}
+
+def compare(cur, ref, tol=0.2):
+    """Imprime la razón actual/referencia por etapa; devuelve cuántas etapas empeoraron más de tol."""
+    bad = 0
+    for years, stages in cur["resultados"].items():
+        for name, r in stages.items():
+            old = ref["resultados"].get(years, {}).get(name)
+            if not isinstance(r, dict) or not isinstance(old, dict) or not old["s"]: continue
+            ratio = r["s"] / old["s"]
+            flag = "  <-- más lento" if ratio > 1 + tol else ""
+            bad += bool(flag)
+            print(f"{years:>3} años {name:<22} {old['s']:>9.3f}s -> {r['s']:>9.3f}s  x{ratio:.2f}{flag}")
+    return bad
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--anios", type=float, nargs="+", default=[1, 10, 50])
+    ap.add_argument("--arboles", type=int, default=100, help="n_estimators del ajuste medido")
+    ap.add_argument("--dir", default=os.path.join(tempfile.gettempdir(), "bench_clima"), help="dónde guardar los CSV sintéticos")
+    ap.add_argument("--salida", default="bench_clima.json")
+    ap.add_argument("--comparar", help="JSON de una corrida anterior")
+    ap.add_argument("--sin-memoria", action="store_true", help="no medir memoria (cada etapa corre una vez)")
+    a = ap.parse_args()
+    MEMORY = not a.sin_memoria
+    os.makedirs(a.dir, exist_ok=True)
+    out = {"entorno": environment(), "arboles": a.arboles, "resultados": {}}
+    for years in a.anios:
+        key = f"{years:g}"
+        out["resultados"][key] = r = run(years, a.arboles, a.dir)
+        print(f"{key} años ({r['filas']} filas): " + ", ".join(f"{k} {v['s']:.3f}s" + (f"/{v['peak_mb']:.0f}MB" if MEMORY else "")
+                                                         for k, v in r.items() if isinstance(v, dict)), flush=True)
+    json.dump(out, open(a.salida, "w"), indent=2)
+    print(f"Archivo guardado: {a.salida}")
+    if a.comparar and compare(out, json.load(open(a.comparar))): sys.exit(1)
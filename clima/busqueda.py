@@ -0,0 +1,102 @@
+# guardar como busqueda.py
+# Búsqueda de hiperparámetros del GBR por successive halving sobre cortes temporales.
+# Uso:
+#   python busqueda.py weather.csv [--configs 27 --eta 3 --min-arboles 100 --niveles 3
+#                                   --cortes 3 --val 720 --procesos 4]
+#   python entrenamiento.py weather.csv --params busqueda_mejor.json
+# Nivel k: cada configuración sobreviviente se evalúa con min_arboles*eta**k árboles y pasa el mejor
+# 1/eta. Los modelos de cada (configuración, corte) se guardan y el nivel siguiente continúa con
+# warm_start agregando sólo los árboles que faltan. Cada prueba terminada se agrega a
+# busqueda_resultados.jsonl; al repetir el comando se saltan las que ya están ahí. La clave de cada
+# prueba incluye una huella de los datos y los cortes (filas, primera/última hora, límites de cada corte):
+# con otro CSV, --val o --cortes no se reusan resultados ni modelos.
+import os, json, hashlib, argparse, itertools, numpy as np
+from concurrent.futures import as_completed
+from sklearn.ensemble import GradientBoostingRegressor
+from features import load_weather, as_frame
+from modelo import GBR_PARAMS
+from backtest import full_matrix, shared_pool, shared
+
+SPACE = {"learning_rate": [0.02, 0.035, 0.05, 0.1],
+         "max_depth": [2, 3, 4, 5],
+         "subsample": [0.7, 0.85, 1.0],
+         "max_features": ["sqrt", 0.5, None],
+         "min_samples_leaf": [1, 5, 20]}
+RESULTS, MODELS, BEST = "busqueda_resultados.jsonl", "busqueda_modelos", "busqueda_mejor.json"
+
+def key(params, data=""):
+    return hashlib.sha1((json.dumps(params, sort_keys=True) + data).encode()).hexdigest()[:10]
+
+def fingerprint(df, sp):
+    """Huella de los datos y los cortes: sólo se reanudan pruebas con la misma."""
+    ts = df["timestamp"]
+    return json.dumps([len(df), str(ts.iloc[0]), str(ts.iloc[-1]), [list(map(int, s)) for s in sp]])
+
+def sample(n, seed=0):
+    grid = list(itertools.product(*SPACE.values()))
+    idx = np.random.RandomState(seed).choice(len(grid), size=min(n, len(grid)), replace=False)
+    return [dict(zip(SPACE, grid[i])) for i in idx]
+
+def splits(n, k, val):
+    """k cortes expansivos: entrena en [0, o) y valida en las `val` horas siguientes; el último termina en n."""
+    return [(n - (k - i) * val, n - (k - i - 1) * val) for i in range(k)]
+
+def run_trial(job):
+    k, params, f, (o, hi), budget = job
+    import joblib
+    X, y, ok = shared()
+    tr, te = np.arange(o)[ok[:o]], np.arange(o, hi)[ok[o:hi]]
+    path = os.path.join(MODELS, f"{k}_{f}.joblib")
+    m = joblib.load(path) if os.path.exists(path) else None
+    if m is None or m.n_estimators_ > budget:
+        m = GradientBoostingRegressor(**dict(GBR_PARAMS, **params, n_iter_no_change=None, warm_start=True))
+    m.set_params(n_estimators=budget)
+    m.fit(as_frame(X[tr]), y[tr])   # con warm_start sólo ajusta las etapas que faltan
+    joblib.dump(m, path + ".tmp"); os.replace(path + ".tmp", path)
+    mae = float(np.abs(m.predict(as_frame(X[te])) - y[te]).mean())
+    return {"key": k, "params": params, "fold": f, "budget": budget, "mae": mae}
+
+def search(df, n_configs=27, eta=3, min_trees=100, levels=3, n_splits=3, val=24*30, workers=None):
+    X, y, ok = full_matrix(df)
+    sp = splits(len(df), n_splits, val)
+    if sp[0][0] < 24*30: raise ValueError("Muy pocas horas para esos cortes; reduce --cortes o --val.")
+    data = fingerprint(df, sp)
+    done = {}
+    if os.path.exists(RESULTS):
+        for line in open(RESULTS):
+            r = json.loads(line)
+            if r.get("datos") == data: done[(r["key"], r["budget"], r["fold"])] = r
+        if done: print(f"Reanudando: {len(done)} pruebas ya registradas en {RESULTS} con estos datos y cortes.")
+    os.makedirs(MODELS, exist_ok=True)
+    configs = sample(n_configs)
+    trial_key = lambda p: key(p, data)
+    with shared_pool(X, y, ok, workers) as ex, open(RESULTS, "a") as log:
+        for lev in range(levels):
+            budget = min_trees * eta**lev
+            jobs = [(trial_key(p), p, i, s, budget) for p in configs for i, s in enumerate(sp)
+                    if (trial_key(p), budget, i) not in done]
+            for fut in as_completed([ex.submit(run_trial, j) for j in jobs]):
+                r = dict(fut.result(), datos=data)
+                log.write(json.dumps(r) + "\n"); log.flush()
+                done[(r["key"], r["budget"], r["fold"])] = r
+            score = {trial_key(p): np.mean([done[(trial_key(p), budget, i)]["mae"] for i in range(len(sp))]) for p in configs}
+            configs = sorted(configs, key=lambda p: score[trial_key(p)])
+            print(f"\nNivel {lev} ({budget} árboles): mejor MAE {score[trial_key(configs[0])]:.3f} °C con {configs[0]}")
+            if lev < levels - 1: configs = configs[:max(1, len(configs) // eta)]
+    best = dict(configs[0], n_estimators=budget)
+    json.dump({"params": best, "mae_val": score[trial_key(configs[0])]}, open(BEST, "w"), indent=2)
+    return best, score[trial_key(configs[0])]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv")
+    ap.add_argument("--configs", type=int, default=27, help="configuraciones iniciales")
+    ap.add_argument("--eta", type=int, default=3, help="factor de reducción por nivel")
+    ap.add_argument("--min-arboles", type=int, default=100, help="árboles del primer nivel")
+    ap.add_argument("--niveles", type=int, default=3)
+    ap.add_argument("--cortes", type=int, default=3, help="cortes temporales de validación")
+    ap.add_argument("--val", type=int, default=24*30, help="horas de validación por corte")
+    ap.add_argument("--procesos", type=int)
+    a = ap.parse_args()
+    best, mae = search(load_weather(a.csv), a.configs, a.eta, a.min_arboles, a.niveles, a.cortes, a.val, a.procesos)
+    print(f"\nMejores parámetros (MAE validación {mae:.3f} °C): {best}\nArchivo guardado: {BEST}")
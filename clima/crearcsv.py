@@ -1,10 +1,66 @@
 # guardar como fetch_weather_csv.py
-import sys, requests, pandas as pd
-lat, lon = 19.43, -99.13
-start, end = sys.argv[1], sys.argv[2]
-v = "temperature_2m,relative_humidity_2m,dew_point_2m,pressure_msl,cloud_cover,shortwave_radiation,wind_speed_10m,wind_direction_10m"
-u = (f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}"
-     f"&start_date={start}&end_date={end}&hourly={v}&timezone=America%2FMexico_City")
-df = pd.DataFrame(requests.get(u).json()["hourly"]).rename(columns={"time":"timestamp"})
-df.to_csv(f"weather_{start}_to_{end}.csv", index=False)
-print(f"Archivo guardado: weather_{start}_to_{end}.csv")
+# Uso: python crearcsv.py 2020-11-10 2025-11-10 [--dias 90] [--hilos 4] [--lat 19.43 --lon -99.13]
+# Divide el rango en tramos de --dias, los descarga en paralelo (a lo más --hilos a la vez) y guarda
+# cada tramo en weather_{start}_to_{end}.partes/ en cuanto llega. Si la corrida se interrumpe,
+# al repetir el mismo comando sólo se piden los tramos que no están en disco.
+import os, time, shutil, argparse, pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from openmeteo import fetch_hourly, LAT, LON
+
+def chunks(start, end, days):
+    """[(inicio, fin)] de a lo más `days` días cubriendo start..end (inclusivo)."""
+    s, e = pd.Timestamp(start), pd.Timestamp(end)
+    out = []
+    while s <= e:
+        f = min(s + pd.Timedelta(days=days-1), e)
+        out.append((s.date(), f.date())); s = f + pd.Timedelta(days=1)
+    return out
+
+def fetch_chunk(s, e, path, lat=LAT, lon=LON, retries=3):
+    """Descarga un tramo y lo escribe de forma atómica (un .csv existente = tramo terminado)."""
+    for k in range(retries):
+        try:
+            df = fetch_hourly(s, e, lat, lon)
+            break
+        except Exception:
+            if k == retries-1: raise
+            time.sleep(2**k)
+    df.to_csv(path + ".tmp", index=False, date_format="%Y-%m-%dT%H:%M")
+    os.replace(path + ".tmp", path)
+    return len(df)
+
+def download(start, end, days=90, workers=4, lat=LAT, lon=LON):
+    out = f"weather_{start}_to_{end}.csv"
+    parts = out[:-4] + ".partes"
+    os.makedirs(parts, exist_ok=True)
+    todo = [(s, e, os.path.join(parts, f"{s}_{e}.csv")) for s, e in chunks(start, end, days)]
+    pending = [t for t in todo if not os.path.exists(t[2])]
+    if len(pending) < len(todo): print(f"Reanudando: {len(todo)-len(pending)}/{len(todo)} tramos ya en disco.")
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(fetch_chunk, *t, lat, lon): t for t in pending}
+        for f in as_completed(futs):
+            s, e, _ = futs[f]
+            try: print(f"Tramo {s} a {e}: {f.result()} horas")
+            except Exception as err: failed.append((s, e)); print(f"Tramo {s} a {e} falló: {err}")
+    if failed: raise SystemExit(f"{len(failed)} tramos fallaron; vuelve a correr el comando para reanudar.")
+
+    # une los tramos en orden copiando texto, sin cargar todo el rango en memoria
+    with open(out + ".tmp", "w") as w:
+        for i, (_, _, p) in enumerate(todo):
+            with open(p) as r:
+                if i: r.readline()
+                shutil.copyfileobj(r, w)
+    os.replace(out + ".tmp", out)
+    shutil.rmtree(parts)
+    return out
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("start"); ap.add_argument("end")
+    ap.add_argument("--dias", type=int, default=90, help="días por tramo")
+    ap.add_argument("--hilos", type=int, default=4, help="descargas simultáneas")
+    ap.add_argument("--lat", type=float, default=LAT); ap.add_argument("--lon", type=float, default=LON)
+    a = ap.parse_args()
+    print(f"Archivo guardado: {download(a.start, a.end, a.dias, a.hilos, a.lat, a.lon)}")
@@ -1,30 +1,120 @@
 # guardar como entrenamiento.py
-import sys, pandas as pd, numpy as np, pickle
-from sklearn.ensemble import GradientBoostingRegressor
+# Uso:
+#   python entrenamiento.py weather.csv|weather.parquet [desde hasta]   entrenamiento completo (GBR)
+#   python entrenamiento.py weather.csv --hist                          completo con HistGradientBoosting
+#   python entrenamiento.py weather.csv --params busqueda_mejor.json    con los parámetros de busqueda.py
+#   python entrenamiento.py weather.csv --cuantiles                     además modelos de cuantiles 10/50/90%
+#   python entrenamiento.py weather.csv --objetivos temperature_2m pressure_msl cloud_cover ...
+#       un modelo por variable (modelo_temp para la temperatura, modelo_temp_<variable> para las demás);
+#       las features se construyen una vez y los ajustes corren en paralelo.
+#   python entrenamiento.py weather.csv --refrescar [--etapas 100 --contexto 720]
+#       GBR: agrega --etapas árboles al modelo existente usando sólo las horas posteriores a su rango de
+#       entrenamiento (más --contexto horas previas), sin reentrenar la historia completa.
+#       Hist: reentrena completo con el archivo (toda la historia); los cuantiles (GBR) reciben --etapas.
+import json, argparse, numpy as np, pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from features import COLS, TARGET, TARGETS, load_weather, training_matrix, multi_matrix, target_cols, as_frame
+from modelo import save_artifact, load_model, target_path, GBR_PARAMS, HIST_PARAMS
 
-df = pd.read_csv(sys.argv[1]).sort_values("timestamp")
-t = pd.to_datetime(df["timestamp"])
-df["hour"], df["day"], df["month"] = t.dt.hour, t.dt.dayofyear, t.dt.month
-for c,m in [("hour",24),("day",365),("month",12)]:
-    df[f"sin_{c}"], df[f"cos_{c}"] = np.sin(2*np.pi*df[c]/m), np.cos(2*np.pi*df[c]/m)
+QUANTILES = (0.1, 0.5, 0.9)
 
-s = df["temperature_2m"]
-df["lag1"], df["lag2"], df["lag3"] = s.shift(1), s.shift(2), s.shift(3)
-df["roll3"]   = s.rolling(3).mean()
-df["dpress3"] = df["pressure_msl"] - df["pressure_msl"].shift(3)
-df["dcloud3"] = df["cloud_cover"]  - df["cloud_cover"].shift(3)
-df["td_spread"] = df["temperature_2m"] - df["dew_point_2m"]
+def quantile_model(q, params=GBR_PARAMS):
+    return GradientBoostingRegressor(**dict(params, loss="quantile", alpha=q))
 
-cols = ["sin_hour","cos_hour","sin_day","cos_day","sin_month","cos_month",
-        "relative_humidity_2m","dew_point_2m","pressure_msl","cloud_cover",
-        "shortwave_radiation","wind_speed_10m","wind_direction_10m",
-        "lag1","lag2","lag3","roll3","dpress3","dcloud3","td_spread"]
-df = df.dropna()
-X, y = df[cols], df["temperature_2m"]
+def scores(m, X, y, cols=COLS):
+    err = m.predict(as_frame(X, cols)) - y
+    return {"mae_train": float(np.abs(err).mean()), "rmse_train": float(np.sqrt((err**2).mean()))}
 
-m = GradientBoostingRegressor(loss="huber", alpha=0.9, n_estimators=1200,
-    learning_rate=0.035, max_depth=3, subsample=0.85, max_features="sqrt",
-    validation_fraction=0.1, n_iter_no_change=20, random_state=42).fit(X,y)
+def stages(m):
+    return int(m.n_iter_) if hasattr(m, "n_iter_") else int(m.n_estimators_)
 
-pickle.dump((m, cols), open("modelo_temp.pkl","wb"))
-print("Modelo entrenado y guardado como modelo_temp.pkl")
+def refresh(path, df, extra_stages=100, context=24*30):
+    """
+    Actualiza el artefacto con las horas de df posteriores a su rango; devuelve None si no hay nuevas.
+    GradientBoosting: warm start con `extra_stages` etapas más ajustadas sólo a las horas nuevas (+contexto).
+    HistGradientBoosting: su warm start vuelve a calcular los bins con los datos nuevos y descompone los
+    árboles viejos, así que se reentrena completo con toda df (segundos con este booster).
+    Los modelos de cuantiles son GBR en ambos casos y reciben el mismo warm start que el GBR puntual.
+    """
+    art = load_model(path, mmap=False)
+    m, meta = art.model, art.meta
+    if "train_range" not in meta: raise SystemExit("El artefacto no tiene rango de entrenamiento; entrena completo primero.")
+    end = pd.Timestamp(meta["train_range"][1])
+    X, y, ok = training_matrix(df, art.target)
+    ts = df["timestamp"][ok].reset_index(drop=True)
+    new = (ts > end).to_numpy()
+    if not new.any(): return None
+    before = scores(m, X[new], y[new], art.cols)["mae_train"]
+    qm = art.quantiles   # siempre GBR (quantile_model): se les agregan etapas también con Hist
+    use = (ts > end - pd.Timedelta(hours=context)).to_numpy()
+    hist = hasattr(m, "max_iter")
+    for est in ([] if hist else [m]) + list(qm.values()):
+        est.set_params(warm_start=True, n_estimators=stages(est) + extra_stages, n_iter_no_change=None)
+        est.fit(as_frame(X[use], art.cols), y[use])
+    if hist:
+        m = HistGradientBoostingRegressor(**m.get_params()).fit(as_frame(X, art.cols), y)
+        rng, n_train = [str(ts.iloc[0]), str(ts.iloc[-1])], len(ts)
+    else:
+        rng, n_train = [meta["train_range"][0], str(ts[new].iloc[-1])], meta.get("n_train", 0) + int(new.sum())
+    after = scores(m, X[new], y[new], art.cols)["mae_train"]
+    log = meta.get("refreshes", []) + [{"hasta": rng[1], "horas_nuevas": int(new.sum()), "etapas": stages(m),
+                                        "mae_nuevas_antes": before, "mae_nuevas_despues": after}]
+    # las métricas del ajuste original ya no describen al modelo: se recalculan sobre todas las horas de df
+    metrics = dict(meta.get("metrics", {}), **scores(m, X, y, art.cols), n_estimators_=stages(m),
+                   horas_hueco=int(df["hueco"].sum()), horas_imputadas=int(df["imputado"].sum()))
+    for q, e in qm.items():
+        metrics[f"cobertura_q{int(q*100)}"] = float((y <= e.predict(as_frame(X, art.cols))).mean())
+    save_artifact(path, m, art.cols, metrics=metrics,
+                  extra={"train_range": rng, "n_train": int(n_train), "refreshes": log},
+                  quantiles=qm or None, target=art.target)
+    return log[-1]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv"); ap.add_argument("desde", nargs="?"); ap.add_argument("hasta", nargs="?")
+    ap.add_argument("--hist", action="store_true", help="usar HistGradientBoostingRegressor")
+    ap.add_argument("--refrescar", action="store_true", help="agregar etapas al modelo existente")
+    ap.add_argument("--etapas", type=int, default=100)
+    ap.add_argument("--contexto", type=int, default=24*30, help="horas previas al rango del modelo que también se usan")
+    ap.add_argument("--modelo", default="modelo_temp")
+    ap.add_argument("--params", help="JSON de busqueda.py que sobreescribe GBR_PARAMS")
+    ap.add_argument("--cuantiles", action="store_true", help=f"entrenar también cuantiles {QUANTILES} (en paralelo)")
+    ap.add_argument("--objetivos", nargs="+", choices=TARGETS, default=[TARGET], help="variables a pronosticar")
+    ap.add_argument("--procesos", type=int)
+    a = ap.parse_args()
+    df = load_weather(a.csv, a.desde, a.hasta)
+
+    if a.refrescar:
+        for v in a.objetivos:
+            r = refresh(target_path(a.modelo, v), df, a.etapas, a.contexto)
+            if r is None: print(f"{v}: no hay horas nuevas después del rango del modelo; nada que refrescar.")
+            else: print(f"{v}: modelo refrescado hasta {r['hasta']} con {r['horas_nuevas']} horas nuevas "
+                        f"({r['etapas']} etapas; MAE en horas nuevas {r['mae_nuevas_antes']:.3f} -> {r['mae_nuevas_despues']:.3f})")
+    else:
+        params = dict(GBR_PARAMS, **(json.load(open(a.params))["params"] if a.params else {}))
+        X, cols, Y = multi_matrix(df, a.objetivos)
+        jobs, keys, data = [], [], {}
+        for j, v in enumerate(a.objetivos):
+            idx = [cols.index(c) for c in target_cols(v)]
+            ok = ~np.isnan(X[:, idx]).any(axis=1) & ~np.isnan(Y[:, j])
+            data[v] = X[ok][:, idx], Y[ok, j], ok
+            for q in [None] + (list(QUANTILES) if a.cuantiles else []):
+                est = quantile_model(q, params) if q is not None else \
+                      HistGradientBoostingRegressor(**HIST_PARAMS) if a.hist else GradientBoostingRegressor(**params)
+                jobs.append((est, idx, target_cols(v), j)); keys.append((v, q))
+        if len(jobs) == 1:
+            Xv, y, _ = data[a.objetivos[0]]
+            fitted = [jobs[0][0].fit(as_frame(Xv, target_cols(a.objetivos[0])), y)]
+        else:
+            from backtest import fit_targets
+            fitted = fit_targets(jobs, X, Y, a.procesos)
+        for v in a.objetivos:
+            est = {q: e for (w, q), e in zip(keys, fitted) if w == v}
+            m, qm = est.pop(None), est
+            Xv, y, ok = data[v]
+            metrics = dict(scores(m, Xv, y, target_cols(v)), n_estimators_=stages(m),
+                           horas_hueco=int(df["hueco"].sum()), horas_imputadas=int(df["imputado"].sum()))
+            for q, e in qm.items():
+                metrics[f"cobertura_q{int(q*100)}"] = float((y <= e.predict(as_frame(Xv, target_cols(v)))).mean())
+            path = save_artifact(target_path(a.modelo, v), m, target_cols(v), df[ok], metrics, quantiles=qm, target=v)
+            print(f"{v}: modelo entrenado y guardado en {path}/ (MAE train {metrics['mae_train']:.3f}, {metrics['n_estimators_']} árboles)")
@@ -0,0 +1,119 @@
+# guardar como estaciones.py
+# Varias ubicaciones en una sola corrida a partir de un catálogo CSV (estacion,lat,lon).
+# Uso:
+#   python estaciones.py descargar estaciones_ejemplo.csv 2024-11-01 2025-11-10 [--hilos 8]
+#   python estaciones.py entrenar  estaciones_ejemplo.csv [--conjunto] [--hist] [--procesos 4]
+#   python estaciones.py predecir  estaciones_ejemplo.csv "2025-11-10 17:00" [--conjunto] [--salida pred.csv]
+# Por estación: un artefacto en modelos_estaciones/<estacion>/. Con --conjunto: un solo modelo para
+# todas (modelos_estaciones/_conjunto/) que además recibe lat/lon como features.
+import os, argparse, numpy as np, pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor
+from features import COLS, build_features, training_matrix, load_weather, regularize, as_frame
+from modelo import save_artifact, load_model, GBR_PARAMS, HIST_PARAMS
+from openmeteo import fetch_hourly
+
+DATOS, MODELOS = "datos_estaciones", "modelos_estaciones"
+POOLED = "_conjunto"
+POOLED_COLS = COLS + ["lat", "lon"]
+
+def load_catalog(path):
+    cat = pd.read_csv(path)
+    if not {"estacion", "lat", "lon"} <= set(cat.columns): raise ValueError("El catálogo necesita columnas estacion,lat,lon.")
+    if cat["estacion"].duplicated().any(): raise ValueError("Hay estaciones repetidas en el catálogo.")
+    return cat.astype({"estacion": str})
+
+def data_path(est): return os.path.join(DATOS, f"{est}.csv")
+
+def download(cat, start, end, workers=8):
+    """Descarga (vía caché) cada estación en un hilo y escribe datos_estaciones/<estacion>.csv."""
+    os.makedirs(DATOS, exist_ok=True)
+    def one(r):
+        df = fetch_hourly(start, end, r.lat, r.lon)
+        df.to_csv(data_path(r.estacion), index=False, date_format="%Y-%m-%dT%H:%M")
+        return r.estacion, len(df)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for est, n in ex.map(one, cat.itertuples()): print(f"{est}: {n} horas")
+
+def pooled_matrix(X, lat, lon):
+    """Agrega columnas lat/lon constantes a la matriz de una estación (orden de POOLED_COLS)."""
+    return np.column_stack([X, np.full(len(X), lat), np.full(len(X), lon)])
+
+def make_model(hist): return HistGradientBoostingRegressor(**HIST_PARAMS) if hist else GradientBoostingRegressor(**GBR_PARAMS)
+
+def train_station(job):
+    est, hist = job
+    df = load_weather(data_path(est))
+    X, y, ok = training_matrix(df)
+    m = make_model(hist).fit(as_frame(X), y)
+    save_artifact(os.path.join(MODELOS, est), m, COLS, df[ok])
+    return est, len(y)
+
+def train_pooled(cat, hist, workers=None):
+    # las features se calculan por estación (los lags nunca cruzan de una estación a otra)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        parts = list(ex.map(lambda r: (training_matrix(load_weather(data_path(r.estacion))), r.lat, r.lon), cat.itertuples()))
+    X = np.vstack([pooled_matrix(Xs, lat, lon) for (Xs, _, _), lat, lon in parts])
+    y = np.concatenate([ys for (_, ys, _), _, _ in parts])
+    m = make_model(hist).fit(as_frame(X, POOLED_COLS), y)
+    save_artifact(os.path.join(MODELOS, POOLED), m, POOLED_COLS, extra={"estaciones": list(cat["estacion"]), "n_train": int(len(y))})
+    return len(y)
+
+_models = {}   # ruta del artefacto -> (mtime de meta.json, artefacto): se carga una vez por proceso
+
+def cached_model(path, cols=None):
+    """load_model con caché; se vuelve a leer si el artefacto se reentrenó (cambió meta.json)."""
+    mtime = os.path.getmtime(os.path.join(path, "meta.json"))
+    if path not in _models or _models[path][0] != mtime: _models[path] = (mtime, load_model(path, cols))
+    return _models[path][1]
+
+def predict_at(cat, t, pooled=False, workers=8, fetch=fetch_hourly):
+    """
+    Predicción de todas las estaciones para la hora t. Las ventanas de clima se bajan en paralelo y las
+    filas de features se apilan en una matriz; con el modelo en conjunto es un solo predict y por
+    estación un predict por artefacto (cargado una sola vez, ver cached_model).
+    """
+    t = pd.Timestamp(t)
+    def row(r):
+        df = regularize(fetch((t - pd.Timedelta(days=1)).date(), t.date(), r.lat, r.lon))
+        i = pd.Index(df["timestamp"]).get_indexer([t])[0]
+        return build_features(df)[i] if i >= 3 else np.full(len(COLS), np.nan)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        X = np.vstack(list(ex.map(row, cat.itertuples())))
+    ok = ~np.isnan(X).any(axis=1)
+    pred = np.full(len(cat), np.nan)
+    if pooled:
+        m = cached_model(os.path.join(MODELOS, POOLED), POOLED_COLS)
+        Xp = np.column_stack([X, cat["lat"].to_numpy(float), cat["lon"].to_numpy(float)])
+        if ok.any(): pred[ok] = m.predict(Xp[ok])
+    else:
+        paths = np.array([os.path.join(MODELOS, e) for e in cat["estacion"]])
+        for path in np.unique(paths[ok]):
+            rows = np.flatnonzero(ok & (paths == path))
+            pred[rows] = cached_model(path).predict(X[rows])
+    return pd.DataFrame({"estacion": cat["estacion"], "lat": cat["lat"], "lon": cat["lon"],
+                         "timestamp": t, "pred_temperature_2m": pred})
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("accion", choices=["descargar", "entrenar", "predecir"])
+    ap.add_argument("catalogo"); ap.add_argument("args", nargs="*")
+    ap.add_argument("--conjunto", action="store_true", help="un solo modelo para todas las estaciones")
+    ap.add_argument("--hist", action="store_true", help="usar HistGradientBoostingRegressor")
+    ap.add_argument("--procesos", type=int); ap.add_argument("--hilos", type=int, default=8)
+    ap.add_argument("--salida", default="predicciones_estaciones.csv")
+    a = ap.parse_args()
+    cat = load_catalog(a.catalogo)
+
+    if a.accion == "descargar":
+        download(cat, a.args[0], a.args[1], a.hilos)
+    elif a.accion == "entrenar" and a.conjunto:
+        print(f"Modelo en conjunto entrenado con {train_pooled(cat, a.hist, a.hilos)} filas de {len(cat)} estaciones.")
+    elif a.accion == "entrenar":
+        with ProcessPoolExecutor(max_workers=a.procesos) as ex:
+            for est, n in ex.map(train_station, [(e, a.hist) for e in cat["estacion"]]):
+                print(f"{est}: modelo entrenado con {n} filas")
+    else:
+        out = predict_at(cat, a.args[0], a.conjunto, a.hilos)
+        out.to_csv(a.salida, index=False)
+        print(out.to_string(index=False, float_format="%.2f")); print(f"Archivo guardado: {a.salida}")
@@ -1,38 +1,86 @@
 # guardar como evalua_modelo.py
-import sys, pandas as pd, numpy as np, matplotlib.pyplot as plt
+# Uso:
+#   python evalua_modelo.py weather.csv                      corte 80/20 y gráfica eval_pred_vs_real.png
+#   python evalua_modelo.py weather.csv --walk-forward [--inicial 8760 --paso 168 --ventana N
+#                           --horizonte 24 --cada 24 --procesos 4 --arboles 300]
+#   python evalua_modelo.py weather.csv --modelo modelo_temp [--bloque 100000]
+#       sin reentrenar: califica el artefacto sobre el archivo por bloques y desglosa por hora y mes
+import argparse, numpy as np, pandas as pd, matplotlib.pyplot as plt
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error
+from features import load_weather, iter_weather, training_matrix, as_frame
+from modelo import GBR_PARAMS, load_model
 
-csv = sys.argv[1] if len(sys.argv)>1 else "weather_2024-11-10_to_2025-11-10.csv"
-df = pd.read_csv(csv).sort_values("timestamp")
-t = pd.to_datetime(df["timestamp"])
-df["hour"], df["day"], df["month"] = t.dt.hour, t.dt.dayofyear, t.dt.month
-for c,m in [("hour",24),("day",365),("month",12)]:
-    df[f"sin_{c}"], df[f"cos_{c}"] = np.sin(2*np.pi*df[c]/m), np.cos(2*np.pi*df[c]/m)
-s = df["temperature_2m"]
-df["lag1"], df["lag2"], df["lag3"] = s.shift(1), s.shift(2), s.shift(3)
-df["roll3"]   = s.rolling(3).mean()
-df["dpress3"] = df["pressure_msl"] - df["pressure_msl"].shift(3)
-df["dcloud3"] = df["cloud_cover"]  - df["cloud_cover"].shift(3)
-df["td_spread"] = df["temperature_2m"] - df["dew_point_2m"]
+def holdout(df, params):
+    X, y, _ = training_matrix(df)
+    cut = int(len(X)*0.8)
+    Xtr, Xte, ytr, yte = as_frame(X[:cut]), as_frame(X[cut:]), y[:cut], y[cut:]
+    m = GradientBoostingRegressor(**params).fit(Xtr,ytr)
 
-cols = ["sin_hour","cos_hour","sin_day","cos_day","sin_month","cos_month",
-        "relative_humidity_2m","dew_point_2m","pressure_msl","cloud_cover",
-        "shortwave_radiation","wind_speed_10m","wind_direction_10m",
-        "lag1","lag2","lag3","roll3","dpress3","dcloud3","td_spread"]
-df = df.dropna()
-X, y = df[cols], df["temperature_2m"]
+    p = m.predict(Xte)
+    mae = mean_absolute_error(yte,p); rmse = float(np.sqrt(mean_squared_error(yte,p)))
+    print(f"MAE: {mae:.3f} °C | RMSE: {rmse:.3f} °C | N test: {len(yte)}")
 
-cut = int(len(df)*0.8)
-Xtr, Xte, ytr, yte = X.iloc[:cut], X.iloc[cut:], y.iloc[:cut], y.iloc[cut:]
-m = GradientBoostingRegressor(loss="huber", alpha=0.9, n_estimators=1200,
-    learning_rate=0.035, max_depth=3, subsample=0.85, max_features="sqrt",
-    validation_fraction=0.1, n_iter_no_change=20, random_state=42).fit(Xtr,ytr)
+    plt.figure(figsize=(9,4)); plt.plot(yte, label="Real"); plt.plot(p, label="Pred")
+    plt.title(f"Test MAE={mae:.2f}  RMSE={rmse:.2f}"); plt.xlabel("Horas (test)"); plt.ylabel("°C"); plt.legend(); plt.tight_layout()
+    plt.savefig("eval_pred_vs_real.png"); print("Gráfica guardada: eval_pred_vs_real.png")
 
-p = m.predict(Xte)
-mae = mean_absolute_error(yte,p); rmse = mean_squared_error(yte,p, squared=False)
-print(f"MAE: {mae:.3f} °C | RMSE: {rmse:.3f} °C | N test: {len(yte)}")
+def score_stored(path, modelo, rows=100_000):
+    """MAE/RMSE/sesgo del artefacto por hora del día y por mes; memoria acotada por el tamaño de bloque."""
+    m = load_model(modelo)
+    acc = {"hora": np.zeros((4, 24)), "mes": np.zeros((4, 12))}   # suma |e|, suma e², suma e, n
+    for df, desde in iter_weather(path, rows):
+        X, y, ok = training_matrix(df, m.target)
+        ts = df["timestamp"][ok]
+        if desde is not None:
+            new = (ts > desde).to_numpy(); X, y, ts = X[new], y[new], ts[new]
+        if not len(y): continue
+        e = m.predict(X) - y
+        for k, idx in (("hora", ts.dt.hour.to_numpy()), ("mes", ts.dt.month.to_numpy() - 1)):
+            n = acc[k].shape[1]
+            acc[k] += [np.bincount(idx, np.abs(e), n), np.bincount(idx, e**2, n), np.bincount(idx, e, n), np.bincount(idx, minlength=n)]
+    out = {}
+    for k, (a, q, b, n) in acc.items():
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[k] = pd.DataFrame({k: np.arange(len(n)) + (k == "mes"), "n": n.astype(int),
+                                   "mae": a/n, "rmse": np.sqrt(q/n), "sesgo": b/n})
+    a, q, n = acc["hora"][0].sum(), acc["hora"][1].sum(), acc["hora"][3].sum()
+    return out["hora"], out["mes"], {"mae": a/n, "rmse": np.sqrt(q/n), "n": int(n)}
 
-plt.figure(figsize=(9,4)); plt.plot(yte.values, label="Real"); plt.plot(p, label="Pred")
-plt.title(f"Test MAE={mae:.2f}  RMSE={rmse:.2f}"); plt.xlabel("Horas (test)"); plt.ylabel("°C"); plt.legend(); plt.tight_layout()
-plt.savefig("eval_pred_vs_real.png"); print("Gráfica guardada: eval_pred_vs_real.png")
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv", nargs="?", default="weather_2024-11-10_to_2025-11-10.csv")
+    ap.add_argument("--walk-forward", action="store_true", help="backtesting con origen móvil")
+    ap.add_argument("--inicial", type=int, default=24*365, help="horas del primer entrenamiento")
+    ap.add_argument("--paso", type=int, default=24*7, help="horas entre reentrenamientos (tamaño del fold)")
+    ap.add_argument("--ventana", type=int, help="ventana móvil en horas (por defecto expansiva)")
+    ap.add_argument("--horizonte", type=int, default=24, help="horas del pronóstico recursivo por origen")
+    ap.add_argument("--cada", type=int, default=24, help="horas entre orígenes dentro de cada fold")
+    ap.add_argument("--procesos", type=int, help="procesos en paralelo (por defecto, núcleos)")
+    ap.add_argument("--arboles", type=int, help="n_estimators (por defecto el de GBR_PARAMS)")
+    ap.add_argument("--modelo", help="artefacto ya entrenado: evaluar sin reentrenar")
+    ap.add_argument("--bloque", type=int, default=100_000, help="horas por bloque al leer el archivo")
+    a = ap.parse_args()
+    params = dict(GBR_PARAMS, **({"n_estimators": a.arboles} if a.arboles else {}))
+    if a.modelo:
+        por_hora, por_mes, tot = score_stored(a.csv, a.modelo, a.bloque)
+        por_hora.to_csv("eval_por_hora.csv", index=False); por_mes.to_csv("eval_por_mes.csv", index=False)
+        print(f"MAE: {tot['mae']:.3f} °C | RMSE: {tot['rmse']:.3f} °C | N: {tot['n']}")
+        print(por_mes.to_string(index=False, float_format="%.3f"))
+        fig, ax = plt.subplots(1, 2, figsize=(11,4))
+        ax[0].bar(por_hora["hora"], por_hora["mae"]); ax[0].set_xlabel("Hora del día"); ax[0].set_ylabel("MAE °C")
+        ax[1].bar(por_mes["mes"], por_mes["mae"]); ax[1].set_xlabel("Mes"); ax[1].set_ylabel("MAE °C")
+        fig.suptitle(f"{a.modelo}: MAE={tot['mae']:.2f}  RMSE={tot['rmse']:.2f}"); fig.tight_layout()
+        fig.savefig("eval_por_hora_mes.png")
+        print("Archivos guardados: eval_por_hora.csv, eval_por_mes.csv, eval_por_hora_mes.png")
+    elif not a.walk_forward:
+        holdout(load_weather(a.csv), params)
+    else:
+        from backtest import walk_forward
+        por_fold, por_h = walk_forward(load_weather(a.csv), a.inicial, a.paso, a.ventana, a.horizonte, a.cada, params, a.procesos)
+        por_fold.to_csv("backtest_folds.csv", index=False); por_h.to_csv("backtest_horizontes.csv", index=False)
+        print(por_fold[["fold","origen","n_train","n_test","mae","rmse"]].to_string(index=False, float_format="%.3f"))
+        print(f"\nMAE a 1 h (media de {len(por_fold)} folds): {por_fold['mae'].mean():.3f} °C | RMSE: {por_fold['rmse'].mean():.3f} °C")
+        for h in sorted({1, 3, 6, 12, 24, a.horizonte}):
+            if h <= a.horizonte: print(f"Recursivo a {h:>3} h: MAE {por_h['mae'].iloc[h-1]:.3f} °C | RMSE {por_h['rmse'].iloc[h-1]:.3f} °C")
+        print("Archivos guardados: backtest_folds.csv, backtest_horizontes.csv")
@@ -0,0 +1,207 @@
+# guardar como features.py
+# Features compartidas por entrenamiento.py, evalua_modelo.py y prediccion.py.
+# Todo se calcula con arreglos NumPy sobre el rango completo de timestamps.
+import datetime, numpy as np, pandas as pd
+
+VARS = ("temperature_2m,relative_humidity_2m,dew_point_2m,pressure_msl,cloud_cover,"
+        "shortwave_radiation,wind_speed_10m,wind_direction_10m")
+RAW = VARS.split(",")
+COLS = ["sin_hour","cos_hour","sin_day","cos_day","sin_month","cos_month",
+        "relative_humidity_2m","dew_point_2m","pressure_msl","cloud_cover",
+        "shortwave_radiation","wind_speed_10m","wind_direction_10m",
+        "lag1","lag2","lag3","roll3","dpress3","dcloud3","td_spread"]
+TARGET = "temperature_2m"
+
+# columnas de COLS que usan el valor de la hora t de cada variable del API (aparte de temperature_2m)
+USES = {"relative_humidity_2m": ["relative_humidity_2m"],
+        "dew_point_2m": ["dew_point_2m", "td_spread"],
+        "pressure_msl": ["pressure_msl", "dpress3"],
+        "cloud_cover": ["cloud_cover", "dcloud3"],
+        "shortwave_radiation": ["shortwave_radiation"],
+        "wind_speed_10m": ["wind_speed_10m"],
+        "wind_direction_10m": ["wind_direction_10m"]}
+# columnas que, junto con la temperatura de la hora t (roll3, td_spread), casi determinan al objetivo:
+# humedad relativa y punto de rocío se deducen uno del otro con la temperatura, así que sus modelos no
+# pueden usarlas (ver target_cols)
+DETERMINES = {"relative_humidity_2m": ["dew_point_2m", "td_spread", "roll3"],
+              "dew_point_2m": ["relative_humidity_2m", "roll3"]}
+# variables que se pueden pronosticar: temperatura, humedad relativa, punto de rocío, presión, nubosidad,
+# radiación y viento (la dirección del viento es circular y se queda fuera)
+TARGETS = [TARGET] + [v for v in USES if v != "wind_direction_10m"]
+
+def regularize(df, fill="linear", limit=3):
+    """
+    Reindexa df a una rejilla horaria continua (sin ciclos de Python) para que shift(k) siempre sea k horas.
+    Agrega 'hueco' (la hora no venía en los datos), 'imputado' (se rellenó alguna variable) e
+    'imputadas' (bit j = se rellenó RAW[j]). Los valores rellenados sirven como predictores (lags,
+    exógenas) pero no como objetivo: ver observed.
+    fill: "linear" (interpolación en el tiempo), "ffill" o "none"; sólo se rellenan tramos de hasta
+    `limit` horas seguidas; los huecos más largos quedan en NaN y training_matrix descarta esas filas.
+    """
+    if df.empty: return df.assign(hueco=False, imputado=False, imputadas=0)
+    df = df.drop_duplicates("timestamp", keep="last").set_index("timestamp").sort_index()
+    grid = pd.date_range(df.index[0].floor("h"), df.index[-1], freq="h", name="timestamp")
+    present = grid.isin(df.index)
+    df = df.reindex(grid)
+    cols = [c for c in RAW if c in df.columns]
+    na = df[cols].isna()
+    before = na.to_numpy()
+    # largo del tramo de NaN al que pertenece cada hora: los tramos > limit no se tocan (interpolate/ffill
+    # con limit rellenarían las primeras horas de un hueco largo, con valores del otro extremo del hueco)
+    run = na.apply(lambda c: c.groupby((~c).cumsum()).transform("sum"))
+    short = na & (run <= limit)
+    if fill == "linear": df[cols] = df[cols].interpolate(method="time", limit_area="inside").where(~na | short)
+    elif fill == "ffill": df[cols] = df[cols].ffill().where(~na | short)
+    elif fill != "none": raise ValueError(f"fill desconocido: {fill}")
+    df["hueco"] = ~present
+    filled = before & ~df[cols].isna().to_numpy()
+    df["imputado"] = filled.any(axis=1)
+    df["imputadas"] = (filled * (1 << np.array([RAW.index(c) for c in cols]))).sum(axis=1)
+    return df.reset_index()
+
+def observed(df, var):
+    """Valores medidos de var (float): NaN en las horas donde regularize lo rellenó."""
+    y = df[var].to_numpy(float)
+    if "imputadas" not in df: return y
+    return np.where(df["imputadas"].to_numpy() & (1 << RAW.index(var)), np.nan, y)
+
+def end_bound(end):
+    """
+    (límite, inclusivo) para filtrar timestamp hasta `end`: una fecha sin hora ("2024-05-31") abarca
+    todo ese día, así que el límite pasa a ser exclusivo al inicio del día siguiente.
+    """
+    t = pd.Timestamp(end)
+    if isinstance(end, str): dated = ":" not in end and "T" not in end.upper()
+    else: dated = isinstance(end, datetime.date) and not isinstance(end, datetime.datetime)
+    if dated: return t + pd.Timedelta(days=1), False
+    return t, True
+
+def in_range(ts, start=None, end=None):
+    """Máscara booleana de ts (Series de timestamps) dentro de [start, end] (ver end_bound)."""
+    ok = np.ones(len(ts), bool)
+    if start is not None: ok &= (ts >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        t, inclusive = end_bound(end)
+        ok &= (ts <= t if inclusive else ts < t).to_numpy()
+    return ok
+
+def load_weather(path, start=None, end=None, fill="linear", limit=3):
+    """
+    Lee un CSV de crearcsv.py (o .parquet/.feather de almacen.py) ordenado por tiempo, con timestamp
+    como datetime, opcionalmente recortado a [start, end] y regularizado a horario (ver regularize).
+    """
+    if path.endswith((".parquet", ".feather")):
+        from almacen import read_columnar
+        df = read_columnar(path, start, end, ["timestamp"] + RAW)
+    else:
+        df = pd.read_csv(path)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        df = df[in_range(df["timestamp"], start, end)]
+    return regularize(df, fill, limit)
+
+def feather_blocks(path, rows, columns):
+    """
+    Lotes de registros de un .feather (formato Arrow IPC) leídos de uno en uno y juntados hasta ~`rows`
+    filas. almacen.py escribe lotes de ~1 mes; un archivo escrito en un solo lote sale en un solo bloque.
+    """
+    import pyarrow as pa
+    f = pa.ipc.open_file(pa.memory_map(path))
+    acc, n = [], 0
+    for i in range(f.num_record_batches):
+        b = f.get_batch(i).select(columns)
+        acc.append(b); n += b.num_rows
+        if n >= rows:
+            yield pa.Table.from_batches(acc).to_pandas(); acc, n = [], 0
+    if acc: yield pa.Table.from_batches(acc).to_pandas()
+
+def iter_weather(path, rows=100_000, carry=8):
+    """
+    Recorre un archivo de clima por bloques de ~`rows` horas sin cargarlo completo. Cada bloque trae
+    las últimas `carry` filas crudas del anterior (para lags e interpolación en la frontera); produce
+    (df_regularizado, desde) y sólo deben usarse las filas con timestamp > desde (None en el primero).
+    CSV por trozos, Parquet por lotes del lector y Feather por sus lotes de registros (feather_blocks).
+    """
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        blocks = (b.to_pandas() for b in pq.ParquetFile(path).iter_batches(rows, columns=["timestamp"] + RAW))
+    elif path.endswith(".feather"):
+        blocks = feather_blocks(path, rows, ["timestamp"] + RAW)
+    else:
+        blocks = pd.read_csv(path, chunksize=rows)
+    prev, last = None, None
+    for b in blocks:
+        b = b.assign(timestamp=pd.to_datetime(b["timestamp"]))
+        raw = b if prev is None else pd.concat([prev, b], ignore_index=True)
+        yield regularize(raw), last
+        prev, last = raw.tail(carry), raw["timestamp"].max()
+
+def shift(a, k):
+    """Equivalente a Series.shift(k) sobre un arreglo 1D (relleno con NaN)."""
+    out = np.full(a.shape, np.nan)
+    out[k:] = a[:len(a)-k]
+    return out
+
+def cyclic(t):
+    """sin/cos de hora, día del año y mes -> (n, 6) en el orden de COLS."""
+    t = pd.DatetimeIndex(t)
+    out = np.empty((len(t), 6))
+    for j, (x, m) in enumerate([(t.hour, 24), (t.dayofyear, 365), (t.month, 12)]):
+        a = 2*np.pi*np.asarray(x, dtype=float)/m
+        out[:, 2*j], out[:, 2*j+1] = np.sin(a), np.cos(a)
+    return out
+
+def build_features(df):
+    """
+    Matriz (n, len(COLS)) float64 para todas las filas de df (ordenado y horario).
+    Las primeras filas sin historia suficiente para lags/deltas quedan con NaN.
+    """
+    s = df[TARGET].to_numpy(float)
+    pres, cloud = df["pressure_msl"].to_numpy(float), df["cloud_cover"].to_numpy(float)
+    X = np.empty((len(df), len(COLS)))
+    X[:, :6] = cyclic(df["timestamp"])
+    X[:, 6:13] = df[RAW[1:]].to_numpy(float)
+    X[:, 13], X[:, 14], X[:, 15] = shift(s, 1), shift(s, 2), shift(s, 3)
+    X[:, 16] = (s + X[:, 13] + X[:, 14]) / 3
+    X[:, 17] = pres - shift(pres, 3)
+    X[:, 18] = cloud - shift(cloud, 3)
+    X[:, 19] = s - X[:, 7]
+    return X
+
+def target_cols(target=TARGET):
+    """
+    Columnas del modelo de `target`: COLS para la temperatura; para otra variable se quitan las columnas
+    que usan su valor en la hora t (sería predecirla con ella misma) o que lo determinan (DETERMINES) y
+    se agregan sus lags 1-3.
+    """
+    if target == TARGET: return COLS
+    drop = USES[target] + DETERMINES.get(target, [])
+    return [c for c in COLS if c not in drop] + [f"{target}_lag{k}" for k in (1, 2, 3)]
+
+def target_matrix(df, F, target=TARGET):
+    """X de `target` a partir de F = build_features(df), que se calcula una vez para todos los objetivos."""
+    if target == TARGET: return F
+    a = df[target].to_numpy(float)
+    keep = [COLS.index(c) for c in target_cols(target)[:-3]]
+    return np.column_stack([F[:, keep], shift(a, 1), shift(a, 2), shift(a, 3)])
+
+def multi_matrix(df, targets=TARGETS):
+    """
+    (X, cols, Y) para ajustar varios objetivos con una sola construcción de features: X es build_features
+    más los lags de cada objetivo distinto de la temperatura, Y trae una columna por objetivo (NaN donde
+    el valor fue imputado).
+    Las columnas del objetivo v son [cols.index(c) for c in target_cols(v)].
+    """
+    F, others = build_features(df), [v for v in targets if v != TARGET]
+    lags = [shift(df[v].to_numpy(float), k) for v in others for k in (1, 2, 3)]
+    cols = COLS + [c for v in others for c in target_cols(v)[-3:]]
+    return np.column_stack([F] + lags), cols, np.column_stack([observed(df, v) for v in targets])
+
+def training_matrix(df, target=TARGET):
+    """(X, y, ok): filas completas y con objetivo medido (no imputado); ok marca las filas usadas de df."""
+    X, y = target_matrix(df, build_features(df), target), observed(df, target)
+    ok = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+    return X[ok], y[ok], ok
+
+def as_frame(X, cols=COLS):
+    """Envuelve X con nombres de columna (el modelo se entrena con DataFrame)."""
+    return pd.DataFrame(X, columns=cols)
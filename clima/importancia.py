@@ -0,0 +1,106 @@
+# guardar como importancia.py
+# Importancia de las features del modelo de temperatura y qué variables del API se podrían dejar de bajar.
+# Uso:
+#   python importancia.py weather.csv [--modelo modelo_temp] [--repeticiones 5] [--procesos 4]
+#   python importancia.py weather.csv --ablacion [--arboles 300] [--tolerancia 0.01]
+# Permutación: con el modelo ya entrenado (sin reajustar) se revuelve una columna, o todas las que
+# salen de una misma variable del API, y se mide cuánto sube el MAE. Ablación (--ablacion): se reentrena
+# un GBR más chico sin cada variable del API y se compara contra el mismo GBR con todas las columnas.
+# Se evalúa en las horas posteriores al rango de entrenamiento del artefacto (o en el último 20%).
+# La matriz de features se calcula una vez y los procesos la comparten por mmap (backtest.shared_pool).
+import argparse, numpy as np, pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor
+from features import COLS, USES, load_weather, as_frame
+from modelo import load_model, GBR_PARAMS
+from backtest import full_matrix, shared_pool, shared
+
+_m = None
+
+def _model(path):
+    global _m
+    if _m is None: _m = load_model(path, COLS)
+    return _m
+
+def mae(p, y): return float(np.abs(p - y).mean())
+
+def permute(job):
+    """Aumento del MAE en [o, n) al permutar juntas las columnas idx, una vez por semilla."""
+    path, idx, o, seeds = job
+    X, y, ok = shared()
+    te = o + np.flatnonzero(ok[o:])
+    m = _model(path)
+    Xt, yt = np.array(X[te]), y[te]
+    base = mae(m.predict(Xt), yt)
+    out = []
+    for s in seeds:   # las mismas semillas para todas las columnas: diferencias comparables
+        Xp = Xt.copy()
+        Xp[:, idx] = Xt[np.random.RandomState(s).permutation(len(te))][:, idx]
+        out.append(mae(m.predict(Xp), yt) - base)
+    return out
+
+def drop(job):
+    """MAE en [o, n) de un GBR entrenado en [0, o) sin las columnas idx."""
+    idx, o, params = job
+    X, y, ok = shared()
+    keep = [j for j in range(X.shape[1]) if j not in idx]
+    cols = [COLS[j] for j in keep]
+    tr, te = np.flatnonzero(ok[:o]), o + np.flatnonzero(ok[o:])
+    m = GradientBoostingRegressor(**params).fit(as_frame(X[tr][:, keep], cols), y[tr])
+    return mae(m.predict(as_frame(X[te][:, keep], cols)), y[te])
+
+def eval_start(df, art):
+    """Primera fila de evaluación: fin del rango de entrenamiento si deja >= 1 semana, si no el 80%."""
+    end = art.meta.get("train_range", [None, None])[1]
+    after = (df["timestamp"] > pd.Timestamp(end)).to_numpy() if end else np.zeros(len(df), bool)
+    if after.sum() >= 24*7: return int(after.argmax()), True
+    return int(len(df) * 0.8), False
+
+def profile(df, path="modelo_temp", repeats=5, ablation=False, trees=300, tol=0.01, workers=None):
+    """
+    (por_columna, por_variable, dmae_conjunto) con DataFrames ordenados por importancia; dmae_conjunto es
+    el cambio de MAE al quitar a la vez todas las variables prescindibles (None sin ablación o si no hay).
+    """
+    art = load_model(path, COLS)
+    o, outside = eval_start(df, art)
+    if not outside: print("Aviso: no hay horas fuera del rango de entrenamiento; la permutación usa el último 20% (ya visto por el modelo).")
+    X, y, ok = full_matrix(df)
+    seeds = list(range(repeats))
+    groups = {v: [COLS.index(c) for c in cs] for v, cs in USES.items()}
+    params = dict(GBR_PARAMS, n_estimators=trees)
+    joint = None
+    with shared_pool(X, y, ok, workers) as ex:
+        # una sola cola: primero cada columna, luego cada variable del API (nombres pueden coincidir)
+        res = list(ex.map(permute, [(path, [j], o, seeds) for j in range(len(COLS))] +
+                                   [(path, g, o, seeds) for g in groups.values()]))
+        abl = list(ex.map(drop, [([], o, params)] + [(g, o, params) for g in groups.values()])) if ablation else []
+        # lo que se pierde cada una por separado no suma: se confirma quitando juntas las prescindibles
+        cand = [j for (v, g), d in zip(groups.items(), abl[1:]) if d - abl[0] <= tol for j in g]
+        joint = ex.submit(drop, (cand, o, params)).result() - abl[0] if cand else None
+    perm_col, perm_var = res[:len(COLS)], res[len(COLS):]
+    por_col = pd.DataFrame({"columna": COLS,
+                            "variable_api": [next((v for v, cs in USES.items() if c in cs), "") for c in COLS],
+                            "dmae_perm": np.mean(perm_col, axis=1), "dmae_perm_std": np.std(perm_col, axis=1)})
+    por_var = pd.DataFrame({"variable_api": list(groups), "columnas": [",".join(cs) for cs in USES.values()],
+                            "dmae_perm": np.mean(perm_var, axis=1)})
+    if ablation: por_var["dmae_ablacion"] = np.array(abl[1:]) - abl[0]
+    por_var["prescindible"] = por_var["dmae_ablacion" if ablation else "dmae_perm"] <= tol
+    return por_col.sort_values("dmae_perm", ascending=False), por_var.sort_values("dmae_perm", ascending=False), joint
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("csv")
+    ap.add_argument("--modelo", default="modelo_temp")
+    ap.add_argument("--repeticiones", type=int, default=5, help="permutaciones por columna")
+    ap.add_argument("--ablacion", action="store_true", help="reentrenar sin cada variable del API")
+    ap.add_argument("--arboles", type=int, default=300, help="n_estimators de los GBR de la ablación")
+    ap.add_argument("--tolerancia", type=float, default=0.01, help="°C de MAE que se aceptan perder")
+    ap.add_argument("--procesos", type=int)
+    a = ap.parse_args()
+    por_col, por_var, joint = profile(load_weather(a.csv), a.modelo, a.repeticiones, a.ablacion, a.arboles, a.tolerancia, a.procesos)
+    por_col.to_csv("importancia_columnas.csv", index=False); por_var.to_csv("importancia_api.csv", index=False)
+    print(por_col.to_string(index=False, float_format="%.4f"))
+    print("\n" + por_var.to_string(index=False, float_format="%.4f"))
+    drop_vars = por_var.loc[por_var["prescindible"], "variable_api"].tolist()
+    print(f"\nSe pueden dejar de descargar (pierden <= {a.tolerancia} °C de MAE): {', '.join(drop_vars) or 'ninguna'}")
+    if joint is not None: print(f"Quitándolas todas juntas el MAE cambia {joint:+.4f} °C")
+    print("Archivos guardados: importancia_columnas.csv, importancia_api.csv")
@@ -0,0 +1,140 @@
+# guardar como modelo.py
+# Artefacto versionado del modelo de temperatura: un directorio con
+#   meta.json      versión del formato, esquema de features, rango de entrenamiento, métricas, parámetros
+#   modelo.joblib  el estimador de scikit-learn
+#   cuantiles.joblib  (opcional) {q: estimador} para intervalos de predicción, p.ej. 0.1/0.5/0.9
+#   arboles/       (sólo GradientBoosting) los mismos árboles como arreglos NumPy, ver arboles.py
+# meta.json se lee primero (milisegundos) y se valida contra las features que va a construir el
+# predictor; el estimador sólo se carga en el primer predict, con mmap_mode="r" para sus arreglos.
+# Si existe arboles/, los lotes chicos (<= SMALL_BATCH filas) usan el evaluador NumPy, que no importa
+# scikit-learn y es más rápido para pocas filas; los lotes grandes cargan el estimador de scikit-learn.
+# Uso: python modelo.py convertir modelo_temp.pkl   (envuelve un pickle viejo (m, cols))
+import os, sys, json, pickle, numpy as np
+from features import COLS, TARGET, target_cols, as_frame
+
+FORMAT_VERSION = 1
+SMALL_BATCH = 64   # filas hasta las que conviene arboles/ (NumPy); arriba scikit-learn es más rápido
+
+# hiperparámetros del GradientBoostingRegressor usados por entrenamiento.py y evalua_modelo.py
+GBR_PARAMS = dict(loss="huber", alpha=0.9, n_estimators=1200, learning_rate=0.035, max_depth=3,
+                  subsample=0.85, max_features="sqrt", validation_fraction=0.1, n_iter_no_change=20,
+                  random_state=42)
+
+class SchemaError(ValueError):
+    """Las columnas del modelo no coinciden con las que construye features.py."""
+
+class Artifact:
+    def __init__(self, path, meta, model=None, mmap=True):
+        self.path, self.meta, self._model, self.mmap = path, meta, model, mmap
+        self.cols = meta["cols"]
+        self.target = meta.get("target", TARGET)
+        self.qs = meta.get("quantiles", [])
+        self._quantiles = None
+        self._forests = None
+
+    def _load(self, name):
+        import joblib
+        return joblib.load(os.path.join(self.path, name), mmap_mode="r" if self.mmap else None)
+
+    @property
+    def model(self):
+        if self._model is None: self._model = self._load("modelo.joblib")
+        return self._model
+
+    @property
+    def quantiles(self):
+        """{q: estimador} o {} si el artefacto no tiene modelos de cuantiles."""
+        if self._quantiles is None:
+            self._quantiles = {float(q): m for q, m in self._load("cuantiles.joblib").items()} if self.qs else {}
+        return self._quantiles
+
+    @property
+    def forests(self):
+        """(punto, {q: Forest}) de arboles/, o (None, {}) si el artefacto no los tiene."""
+        if self._forests is None:
+            from arboles import load_forests
+            self._forests = load_forests(self.path, self.mmap) if self.meta.get("arboles") else (None, {})
+        return self._forests
+
+    def _numpy(self, X):
+        return len(X) <= SMALL_BATCH and self.forests[0] is not None
+
+    def predict(self, X):
+        """X: arreglo (n, len(cols)) en el orden de cols."""
+        if self._numpy(X): return self.forests[0].predict(X)
+        return self.model.predict(as_frame(np.asarray(X), self.cols))
+
+    def predict_quantiles(self, X):
+        """
+        (n, len(qs)) con los cuantiles de self.qs, evaluados sobre el mismo DataFrame de features.
+        Se ordenan por fila para que las bandas nunca se crucen.
+        """
+        if self._numpy(X):
+            return np.sort(np.column_stack([self.forests[1][q].predict(X) for q in self.qs]), axis=1)
+        F = as_frame(np.asarray(X), self.cols)
+        return np.sort(np.column_stack([self.quantiles[q].predict(F) for q in self.qs]), axis=1)
+
+# alternativa basada en histogramas: reentrenar toda la historia toma segundos en lugar de minutos
+HIST_PARAMS = dict(loss="squared_error", max_iter=500, learning_rate=0.1, max_leaf_nodes=31,
+                   early_stopping=True, validation_fraction=0.1, n_iter_no_change=20, random_state=42)
+
+def save_artifact(path, model, cols, df=None, metrics=None, extra=None, quantiles=None, target=TARGET):
+    """
+    Guarda model en el directorio path; df (filas de entrenamiento) sólo se usa para el rango.
+    target: variable que predice el modelo (ver features.TARGETS).
+    extra: claves adicionales para meta.json (p.ej. el historial de refrescos).
+    quantiles: {q: estimador} opcional que se guarda junto al modelo puntual.
+    """
+    import joblib, sklearn
+    os.makedirs(path, exist_ok=True)
+    meta = {"format_version": FORMAT_VERSION, "cols": list(cols), "target": target,
+            "estimator": type(model).__name__, "sklearn": sklearn.__version__,
+            "params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+            "metrics": metrics or {}}
+    if df is not None:
+        meta["train_range"] = [str(df["timestamp"].min()), str(df["timestamp"].max())]
+        meta["n_train"] = int(len(df))
+    meta.update(extra or {})
+    if quantiles:
+        meta["quantiles"] = sorted(quantiles)
+        joblib.dump(quantiles, os.path.join(path, "cuantiles.joblib.tmp"))
+        os.replace(os.path.join(path, "cuantiles.joblib.tmp"), os.path.join(path, "cuantiles.joblib"))
+    from arboles import export_artifact
+    meta["arboles"] = export_artifact(path, model, quantiles) is not None
+    joblib.dump(model, os.path.join(path, "modelo.joblib.tmp"))
+    os.replace(os.path.join(path, "modelo.joblib.tmp"), os.path.join(path, "modelo.joblib"))
+    json.dump(meta, open(os.path.join(path, "meta.json"), "w"), indent=2)
+    return path
+
+def target_path(path, target):
+    """Directorio del artefacto de `target`: path para la temperatura, path_<variable> para las demás."""
+    return path if target == TARGET else f"{path}_{target}"
+
+def check_schema(cols, expected=COLS):
+    if list(cols) != list(expected):
+        faltan, sobran = [c for c in expected if c not in cols], [c for c in cols if c not in expected]
+        raise SchemaError(f"El modelo espera otras features (faltan {faltan}, sobran {sobran}"
+                          f"{', orden distinto' if not faltan and not sobran else ''}); reentrena con entrenamiento.py.")
+
+def load_model(path="modelo_temp", expected=None, mmap=True):
+    """
+    Abre un artefacto (directorio) o, si no existe, el pickle viejo path+'.pkl'.
+    Falla con SchemaError antes de predecir si las columnas no coinciden con `expected` (por defecto las
+    que features.py construye para el objetivo del artefacto, ver target_cols).
+    mmap=False carga arreglos escribibles (necesario para seguir entrenando el modelo).
+    """
+    if not os.path.isdir(path) and os.path.exists(path + ".pkl"): path += ".pkl"
+    if os.path.isdir(path):
+        meta = json.load(open(os.path.join(path, "meta.json")))
+        if meta.get("format_version", 0) > FORMAT_VERSION:
+            raise ValueError(f"Artefacto con formato {meta['format_version']}; este código lee hasta {FORMAT_VERSION}.")
+        check_schema(meta["cols"], expected or target_cols(meta.get("target", TARGET)))
+        return Artifact(path, meta, mmap=mmap)
+    m, cols = pickle.load(open(path, "rb"))
+    check_schema(cols, expected or COLS)
+    return Artifact(path, {"format_version": 0, "cols": list(cols)}, m)
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "convertir": raise SystemExit("Uso: python modelo.py convertir modelo_temp.pkl")
+    m, cols = pickle.load(open(sys.argv[2], "rb"))
+    print(f"Artefacto guardado: {save_artifact(os.path.splitext(sys.argv[2])[0], m, cols)}")
@@ -0,0 +1,103 @@
+# guardar como openmeteo.py
+# Descarga horaria del archivo histórico de Open-Meteo como DataFrame, con caché local en disco.
+#
+# Caché: un directorio por (lat, lon, variables) nombrado con el hash de esa clave y un .npz por día
+# (un arreglo por variable). Sólo se descargan los días que faltan; con CLIMA_OFFLINE=1 nunca se
+# llama al API. Para sembrarla desde un CSV existente:
+#   python openmeteo.py sembrar weather_2024-11-01_to_2025-11-11.csv
+import os, sys, json, hashlib, requests, numpy as np, pandas as pd
+from features import VARS
+
+LAT, LON = 19.43, -99.13
+URL = os.environ.get("OPENMETEO_URL", "https://archive-api.open-meteo.com/v1/archive")  # permite un servidor local de prueba
+TZ = "America/Mexico_City"
+CACHE = os.environ.get("CLIMA_CACHE", "cache_openmeteo")
+
+def cache_dir(lat=LAT, lon=LON, variables=VARS, cache=CACHE):
+    key = f"{float(lat):.4f},{float(lon):.4f},{variables},{TZ}"
+    d = os.path.join(cache, hashlib.sha1(key.encode()).hexdigest()[:16])
+    if not os.path.exists(os.path.join(d, "meta.json")):
+        os.makedirs(d, exist_ok=True)
+        json.dump({"lat": lat, "lon": lon, "variables": variables, "timezone": TZ},
+                  open(os.path.join(d, "meta.json"), "w"))
+    return d
+
+def _day_path(d, day): return os.path.join(d, f"{day:%Y-%m-%d}.npz")
+
+def _save_days(d, df, variables):
+    """Guarda cada día completo (sin NaN) de df; los días a medias se volverán a pedir."""
+    n = 0
+    for day, g in df.groupby(df["timestamp"].dt.normalize()):
+        if g[variables.split(",")].isna().any().any(): continue
+        tmp = _day_path(d, day) + ".tmp.npz"
+        np.savez_compressed(tmp, timestamp=g["timestamp"].to_numpy("datetime64[m]").astype(np.int64),
+                            **{v: g[v].to_numpy() for v in variables.split(",")})
+        os.replace(tmp, _day_path(d, day)); n += 1
+    return n
+
+def _load_days(d, days, variables):
+    cols = {c: [] for c in ["timestamp"] + variables.split(",")}
+    for day in days:
+        with np.load(_day_path(d, day)) as z:
+            for c in cols: cols[c].append(z[c])
+    df = pd.DataFrame({c: np.concatenate(a) for c, a in cols.items()})
+    df["timestamp"] = df["timestamp"].astype("datetime64[m]").astype("datetime64[ns]")
+    return df
+
+def _download(start, end, lat, lon, variables):
+    u = (f"{URL}?latitude={lat}&longitude={lon}&start_date={start}&end_date={end}"
+         f"&hourly={variables}&timezone={TZ.replace('/', '%2F')}")
+    r = requests.get(u, timeout=60); r.raise_for_status()
+    df = pd.DataFrame(r.json()["hourly"]).rename(columns={"time":"timestamp"})
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df
+
+def fetch_hourly(start, end, lat=LAT, lon=LON, variables=VARS, cache=CACHE, offline=None):
+    """
+    Horas de start a end (fechas YYYY-MM-DD, inclusivas) con timestamp como datetime.
+    Los días ya en caché se leen de disco; los faltantes se piden al API en tramos contiguos.
+    """
+    offline = os.environ.get("CLIMA_OFFLINE") == "1" if offline is None else offline
+    days = pd.date_range(pd.Timestamp(str(start)), pd.Timestamp(str(end)), freq="D")
+    if cache is None:
+        return _download(days[0].date(), days[-1].date(), lat, lon, variables).sort_values("timestamp", ignore_index=True)
+    d = cache_dir(lat, lon, variables, cache)
+    missing = [day for day in days if not os.path.exists(_day_path(d, day))]
+    fresh = []
+    if missing:
+        if offline: raise RuntimeError(f"Modo offline: faltan {len(missing)} días en caché ({missing[0].date()} ...).")
+        # agrupa días faltantes consecutivos para hacer una sola petición por tramo
+        segs = []
+        for day in missing:
+            if segs and day - segs[-1][-1] == pd.Timedelta(days=1): segs[-1].append(day)
+            else: segs.append([day])
+        for seg in segs:
+            df = _download(seg[0].date(), seg[-1].date(), lat, lon, variables)
+            _save_days(d, df, variables)
+            fresh.append(df)
+    cached = [day for day in days if os.path.exists(_day_path(d, day))]
+    parts = ([_load_days(d, cached, variables)] if cached else []) + fresh
+    df = pd.concat(parts, ignore_index=True).drop_duplicates("timestamp", keep="first")
+    return df.sort_values("timestamp", ignore_index=True)
+
+def csv_source(path):
+    """
+    fetch(start, end) equivalente a fetch_hourly pero servido desde un archivo local (pruebas/sin red).
+    path también puede ser un DataFrame ya leído con load_weather.
+    """
+    from features import load_weather
+    df = load_weather(path) if isinstance(path, str) else path
+    def fetch(start, end):
+        s, e = pd.Timestamp(str(start)), pd.Timestamp(str(end)) + pd.Timedelta(days=1)
+        return df[(df["timestamp"] >= s) & (df["timestamp"] < e)].reset_index(drop=True)
+    return fetch
+
+def seed_cache(df, lat=LAT, lon=LON, variables=VARS, cache=CACHE):
+    """Escribe en caché los días completos de un DataFrame ya descargado (p.ej. un CSV de crearcsv.py)."""
+    df = df.assign(timestamp=pd.to_datetime(df["timestamp"]))
+    return _save_days(cache_dir(lat, lon, variables, cache), df, variables)
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "sembrar": raise SystemExit("Uso: python openmeteo.py sembrar archivo.csv [...]")
+    for p in sys.argv[2:]:
+        print(f"{p}: {seed_cache(pd.read_csv(p))} días en caché")
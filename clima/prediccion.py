@@ -1,30 +1,75 @@
 # guardar como prediccion.py
-import sys, pickle, pandas as pd, numpy as np, requests
-lat, lon = 19.43, -99.13
-fecha, hora = sys.argv[1], sys.argv[2]
-t = pd.to_datetime(f"{fecha} {hora}")
+# Uso:
+#   python prediccion.py 2025-11-10 17:00
+#   python prediccion.py --desde "2025-10-01 00:00" --hasta "2025-10-31 23:00" --salida pred.csv
+#   python prediccion.py --archivo horas.txt --salida pred.parquet   (un timestamp por línea)
+#   python prediccion.py 2025-11-10 17:00 --objetivos temperature_2m pressure_msl cloud_cover
+import argparse, functools, pandas as pd, numpy as np
+from features import TARGET, TARGETS, build_features, target_matrix, regularize, end_bound
+from modelo import load_model, target_path
+from openmeteo import fetch_hourly, LAT, LON
 
-m, cols = pickle.load(open("modelo_temp.pkl","rb"))
-v = "temperature_2m,relative_humidity_2m,dew_point_2m,pressure_msl,cloud_cover,shortwave_radiation,wind_speed_10m,wind_direction_10m"
-u = (f"https://archive-api.open-meteo.com/v1/archive?latitude={lat}&longitude={lon}"
-     f"&start_date={(t-pd.Timedelta(days=1)).date()}&end_date={fecha}&hourly={v}&timezone=America%2FMexico_City")
-df = pd.DataFrame(requests.get(u).json()["hourly"]).rename(columns={"time":"timestamp"}).sort_values("timestamp")
-df["timestamp"] = pd.to_datetime(df["timestamp"])
+def predict_many(m, ts, fetch=fetch_hourly):
+    """
+    Predice todos los timestamps ts con una sola descarga y un solo predict (NaN si no hay datos/lags).
+    m: un artefacto o una lista de artefactos (uno por variable objetivo) que comparten la descarga y
+    build_features; agrega pred_/real_/p<q>_ de cada objetivo.
+    fetch(start, end) devuelve las horas de esas fechas; por defecto el API con caché.
+    """
+    ts = pd.DatetimeIndex(ts)
+    df = regularize(fetch((ts.min()-pd.Timedelta(days=1)).date(), ts.max().date()))
+    F = build_features(df)
+    pos = pd.Index(df["timestamp"]).get_indexer(ts)
+    out = pd.DataFrame({"timestamp": ts})
+    for art in (m if isinstance(m, (list, tuple)) else [m]):
+        v, X = art.target, target_matrix(df, F, art.target)
+        pred = np.full(len(ts), np.nan)
+        ok = pos >= 3
+        ok[ok] = ~np.isnan(X[pos[ok]]).any(axis=1)
+        if ok.any(): pred[ok] = art.predict(X[pos[ok]])
+        real = np.full(len(ts), np.nan)
+        real[pos >= 0] = df[v].to_numpy(float)[pos[pos >= 0]]
+        out[f"pred_{v}"], out[f"real_{v}"] = pred, real
+        if art.qs:   # bandas de los modelos de cuantiles sobre la misma matriz de features
+            Q = np.full((len(ts), len(art.qs)), np.nan)
+            if ok.any(): Q[ok] = art.predict_quantiles(X[pos[ok]])
+            for j, q in enumerate(art.qs): out[f"p{int(round(q*100))}_{v}"] = Q[:, j]
+    return out
 
-row = df[df["timestamp"] == pd.to_datetime(f"{fecha} {hora}:00")]
-if row.empty: raise SystemExit("No se encontró esa hora en el API (revisa fecha/hora).")
-i = row.index[0]
-if i < 3:     raise SystemExit("No hay suficientes horas previas para lags.")
+def save(out, path):
+    if path.endswith(".parquet"): out.to_parquet(path, index=False)
+    else:                         out.to_csv(path, index=False)
+    n = int(out.filter(like="pred_").notna().all(axis=1).sum())
+    print(f"Archivo guardado: {path} ({n}/{len(out)} horas con predicción)")
 
-lag1, lag2, lag3 = [df["temperature_2m"].iloc[i-j] for j in (1,2,3)]
-roll3   = df["temperature_2m"].iloc[i-2:i+1].mean()
-dpress3 = df["pressure_msl"].iloc[i] - df["pressure_msl"].iloc[i-3]
-dcloud3 = df["cloud_cover"].iloc[i]  - df["cloud_cover"].iloc[i-3]
-td_spread = row["temperature_2m"].iloc[0] - row["dew_point_2m"].iloc[0]
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("fecha", nargs="?"); ap.add_argument("hora", nargs="?")
+    ap.add_argument("--desde"); ap.add_argument("--hasta")
+    ap.add_argument("--archivo", help="archivo con un timestamp por línea")
+    ap.add_argument("--salida", default="predicciones.csv", help=".csv o .parquet")
+    ap.add_argument("--modelo", default="modelo_temp", help="artefacto de entrenamiento.py (o .pkl viejo)")
+    ap.add_argument("--objetivos", nargs="+", choices=TARGETS, default=[TARGET],
+                    help="variables a predecir (modelos de entrenamiento.py --objetivos)")
+    ap.add_argument("--lat", type=float, default=LAT); ap.add_argument("--lon", type=float, default=LON)
+    a = ap.parse_args()
 
-hum, dew, pres, cloud, swr, wind, wdir = row[["relative_humidity_2m","dew_point_2m","pressure_msl","cloud_cover","shortwave_radiation","wind_speed_10m","wind_direction_10m"]].iloc[0]
-s = lambda x,m: (np.sin(2*np.pi*x/m), np.cos(2*np.pi*x/m))
-sh,ch = s(t.hour,24); sd,cd = s(t.dayofyear,365); sm,cm = s(t.month,12)
-
-X = pd.DataFrame([[sh,ch,sd,cd,sm,cm,hum,dew,pres,cloud,swr,wind,wdir,lag1,lag2,lag3,roll3,dpress3,dcloud3,td_spread]], columns=cols)
-print(round(m.predict(X)[0],2), "°C")
+    m = [load_model(target_path(a.modelo, v)) for v in a.objetivos]
+    fetch = functools.partial(fetch_hourly, lat=a.lat, lon=a.lon)
+    if a.fecha:
+        t = pd.to_datetime(f"{a.fecha} {a.hora}")
+        out = predict_many(m, [t], fetch)
+        r = out.iloc[0]
+        if np.isnan(r[f"real_{a.objetivos[0]}"]): raise SystemExit("No se encontró esa hora en el API (revisa fecha/hora).")
+        for v in a.objetivos:
+            if np.isnan(r[f"pred_{v}"]): raise SystemExit(f"No hay suficientes horas previas para lags ({v}).")
+            bands = " | ".join(f"{c.split('_')[0]}: {r[c]:.2f}" for c in out.columns if c[0] == "p" and c[1].isdigit() and c.endswith(v))
+            print(*([v + ":"] if len(a.objetivos) > 1 else []), round(r[f"pred_{v}"], 2),
+                  ("°C" if v == TARGET else "") + (f"  ({bands})" if bands else ""))
+    else:
+        if a.archivo: ts = pd.to_datetime(pd.read_csv(a.archivo, header=None)[0])
+        elif a.desde and a.hasta:
+            t, inc = end_bound(a.hasta)   # --hasta 2025-10-31 incluye todo ese día
+            ts = pd.date_range(a.desde, t, freq="h", inclusive="both" if inc else "left")
+        else: ap.error("indica fecha hora, --desde/--hasta o --archivo")
+        save(predict_many(m, ts, fetch), a.salida)
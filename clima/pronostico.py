@@ -0,0 +1,72 @@
+# guardar como pronostico.py
+# Pronóstico recursivo a varias horas: cada predicción alimenta lag1-3/roll3 del paso siguiente.
+# Uso:
+#   python pronostico.py "2025-11-01 12:00" 48 --csv weather_2024-11-01_to_2025-11-11.csv
+#   python pronostico.py "2025-11-01 12:00" 168 --salida pronostico.csv      (descarga la ventana)
+import argparse, numpy as np, pandas as pd
+from collections import deque
+from features import COLS, build_features, load_weather, regularize, TARGET
+from modelo import load_model
+
+def recursive(m, X, hist, refine=1):
+    """
+    Núcleo del pronóstico: X (h, n) son las features de las h horas a pronosticar ya calculadas
+    (exógenas/cíclicas válidas) y hist las últimas 3 temperaturas observadas. Sólo las columnas que
+    dependen de la temperatura se actualizan por paso desde un buffer circular de 3 valores.
+    roll3 y td_spread usan la temperatura de la propia hora: se parte de lag1 y se refina `refine` veces
+    con la predicción del paso.
+    """
+    X = np.array(X, dtype=float)
+    il1, il2, il3, iroll, itd, idew = (m.cols.index(c) for c in
+        ("lag1","lag2","lag3","roll3","td_spread","dew_point_2m"))
+    buf = deque(hist, maxlen=3)
+    out = np.empty(len(X))
+    for k in range(len(X)):
+        x = X[k:k+1]
+        l1, l2, l3 = buf[-1], buf[-2], buf[-3]
+        x[0, il1], x[0, il2], x[0, il3] = l1, l2, l3
+        cur = l1
+        for _ in range(refine+1):
+            x[0, iroll], x[0, itd] = (cur+l1+l2)/3, cur - x[0, idew]
+            cur = m.predict(x)[0]
+        out[k] = cur
+        buf.append(cur)
+    return out
+
+def forecast(m, df, origin, horizon, refine=1):
+    """
+    Predice las horas origin+1 .. origin+horizon. df debe cubrir desde origin-2h hasta el final del
+    horizonte con las variables exógenas; temperature_2m sólo se lee hasta origin (última hora observada).
+    """
+    pos = pd.Index(df["timestamp"]).get_indexer([pd.Timestamp(origin)])[0]
+    if pos < 2: raise ValueError("Se necesitan al menos 3 horas observadas hasta el origen.")
+    if pos + horizon >= len(df): raise ValueError("df no cubre todo el horizonte pedido.")
+    s = df[TARGET].to_numpy(float)
+    out = recursive(m, build_features(df)[pos+1:pos+1+horizon], s[pos-2:pos+1], refine)
+    return pd.DataFrame({"timestamp": df["timestamp"].to_numpy()[pos+1:pos+1+horizon],
+                         "paso": np.arange(1, horizon+1), "pred_temperature_2m": out,
+                         "real_temperature_2m": s[pos+1:pos+1+horizon]})
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("origen", help='última hora observada, p.ej. "2025-11-01 12:00"')
+    ap.add_argument("horizonte", type=int, help="horas a pronosticar (24, 48, 168...)")
+    ap.add_argument("--csv", help="CSV local con exógenas; si falta se descarga del API")
+    ap.add_argument("--refinar", type=int, default=1)
+    ap.add_argument("--salida", default="pronostico.csv")
+    ap.add_argument("--modelo", default="modelo_temp", help="artefacto de entrenamiento.py (o .pkl viejo)")
+    a = ap.parse_args()
+
+    t0 = pd.Timestamp(a.origen)
+    if a.csv: df = load_weather(a.csv)
+    else:
+        from openmeteo import fetch_hourly
+        df = regularize(fetch_hourly((t0-pd.Timedelta(days=1)).date(), (t0+pd.Timedelta(hours=a.horizonte)).date()))
+    m = load_model(a.modelo, COLS)   # el pronóstico recursivo es sólo de temperatura
+    out = forecast(m, df, t0, a.horizonte, a.refinar)
+    out.to_csv(a.salida, index=False)
+    err = (out["pred_temperature_2m"] - out["real_temperature_2m"]).abs()
+    if err.notna().any():
+        for h in sorted({6, 12, 24, 48, 168, a.horizonte}):
+            if h <= a.horizonte: print(f"MAE a {h:>3} h: {err.iloc[:h].mean():.3f} °C")
+    print(f"Archivo guardado: {a.salida}")
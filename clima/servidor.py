@@ -0,0 +1,124 @@
+# guardar como servidor.py
+# Servidor de predicción (asyncio, sólo biblioteca estándar) que mantiene el modelo en memoria.
+# Uso:
+#   python servidor.py [--puerto 8080] [--unix /tmp/clima.sock] [--csv weather.csv]
+#   curl "localhost:8080/predict?t=2025-11-10T17:00"   ->  {"timestamp": ..., "pred_temperature_2m": ...}
+#   curl "localhost:8080/metrics"                       ->  contadores de latencia y throughput
+# Las peticiones que llegan casi juntas (--espera ms, hasta --lote) se agrupan en una sola llamada a
+# predict_many: una descarga de clima y un predict por ventana de tiempo (--ventana días como máximo),
+# así dos peticiones con meses de distancia no obligan a bajar y procesar todo el tramo entre ellas.
+import time, json, asyncio, argparse, numpy as np, pandas as pd
+from urllib.parse import urlparse, parse_qs
+from modelo import load_model
+from prediccion import predict_many
+
+def windows(ts, max_span=pd.Timedelta(days=7)):
+    """Agrupa las posiciones de ts en ventanas de horas cercanas que abarcan a lo más max_span."""
+    order = np.argsort(pd.DatetimeIndex(ts).asi8, kind="stable")
+    groups, start = [], None
+    for i in order.tolist():
+        if start is None or ts[i] - start > max_span: groups.append([]); start = ts[i]
+        groups[-1].append(i)
+    return groups
+
+def predict_windows(m, ts, fetch, max_span=pd.Timedelta(days=7)):
+    """predict_many por ventana (ver windows); las filas salen en el orden de ts."""
+    parts = [predict_many(m, [ts[i] for i in g], fetch).set_index(pd.Index(g)) for g in windows(ts, max_span)]
+    return pd.concat(parts).sort_index()
+
+class Server:
+    def __init__(self, m, fetch, max_batch=256, max_wait=0.005, max_span=pd.Timedelta(days=7)):
+        self.m, self.fetch, self.max_batch, self.max_wait = m, fetch, max_batch, max_wait
+        self.max_span = max_span
+        self.q = None
+        self.t0 = time.time()
+        self.n_req = self.n_err = self.n_batch = self.n_pred = 0
+        self.lat = np.zeros(4096)   # últimas latencias (s), buffer circular
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.q.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                try: batch.append(await asyncio.wait_for(self.q.get(), deadline - loop.time()))
+                except asyncio.TimeoutError: break
+            ts = [t for t, _ in batch]
+            try:
+                out = await loop.run_in_executor(None, predict_windows, self.m, ts, self.fetch, self.max_span)
+                cols = [c for c in out.columns if c.startswith("p")]   # pred_* y p10/p50/p90 si hay cuantiles
+                for (_, fut), row in zip(batch, out[cols].to_numpy()):
+                    if not fut.done(): fut.set_result(None if np.isnan(row[0]) else dict(zip(cols, map(float, row))))
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done(): fut.set_exception(e)
+            self.n_batch += 1; self.n_pred += len(batch)
+
+    async def predict(self, t):
+        fut = asyncio.get_running_loop().create_future()
+        await self.q.put((t, fut))
+        return await fut
+
+    def metrics(self):
+        n = min(self.n_req, len(self.lat))
+        lat = self.lat[:n] * 1000
+        up = time.time() - self.t0
+        return {"requests": self.n_req, "errors": self.n_err, "batches": self.n_batch,
+                "avg_batch": self.n_pred / self.n_batch if self.n_batch else 0.0,
+                "throughput_rps": self.n_req / up if up else 0.0, "uptime_s": up,
+                "latency_ms": {k: float(np.percentile(lat, q)) if n else None
+                               for k, q in (("p50", 50), ("p95", 95), ("p99", 99))}}
+
+    async def handle(self, reader, writer):
+        start, line = time.perf_counter(), ""
+        try:
+            line = (await reader.readline()).decode()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""): pass
+            target = line.split()[1]
+            url = urlparse(target)
+            if url.path == "/predict":
+                t = pd.Timestamp(parse_qs(url.query)["t"][0])
+                p = await self.predict(t)
+                code, body = (200, {"timestamp": str(t), **p}) if p is not None else \
+                             (404, {"error": "Sin datos o sin horas previas suficientes para esa hora."})
+            elif url.path == "/metrics": code, body = 200, self.metrics()
+            elif url.path == "/health":  code, body = 200, {"ok": True, "modelo": self.m.path}
+            else: code, body = 404, {"error": "Ruta no encontrada."}
+        except Exception as e:
+            code, body = 400, {"error": f"{type(e).__name__}: {e}"}
+        if line.startswith("GET /predict"):
+            self.lat[self.n_req % len(self.lat)] = time.perf_counter() - start
+            self.n_req += 1
+            self.n_err += code != 200
+        data = json.dumps(body).encode()
+        writer.write(f"HTTP/1.1 {code} {'OK' if code == 200 else 'Error'}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        try: await writer.drain()
+        finally: writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8080, unix=None):
+        self.q = asyncio.Queue()
+        asyncio.create_task(self.batcher())
+        srv = await (asyncio.start_unix_server(self.handle, unix) if unix else
+                     asyncio.start_server(self.handle, host, port))
+        print(f"Escuchando en {unix or f'http://{host}:{port}'}", flush=True)
+        async with srv: await srv.serve_forever()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1"); ap.add_argument("--puerto", type=int, default=8080)
+    ap.add_argument("--unix", help="ruta de socket Unix en lugar de TCP")
+    ap.add_argument("--csv", help="servir el clima desde un archivo local en lugar del API")
+    ap.add_argument("--modelo", default="modelo_temp")
+    ap.add_argument("--lote", type=int, default=256, help="máximo de peticiones por predict")
+    ap.add_argument("--espera", type=float, default=5, help="ms que se espera para juntar un lote")
+    ap.add_argument("--ventana", type=float, default=7, help="días máximos que abarca una descarga del lote")
+    a = ap.parse_args()
+    if a.csv:
+        from openmeteo import csv_source
+        fetch = csv_source(a.csv)
+    else:
+        from openmeteo import fetch_hourly as fetch
+    m = load_model(a.modelo)
+    m.forests, m.model   # arboles/ para lotes chicos y el estimador para los grandes, antes de la primera petición
+    asyncio.run(Server(m, fetch, a.lote, a.espera/1000, pd.Timedelta(days=a.ventana)).serve(a.host, a.puerto, a.unix))
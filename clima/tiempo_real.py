@@ -0,0 +1,72 @@
+# guardar como tiempo_real.py
+# Predicción hora por hora sobre un flujo de observaciones, sin reconstruir DataFrames.
+# Uso:
+#   python tiempo_real.py obs.csv [--seguir] [--salida pred_tiempo_real.csv]
+#   tail -f obs.jsonl | python tiempo_real.py -          (una observación JSON por línea)
+# Cada registro trae timestamp y las variables de features.RAW (como las filas de crearcsv.py). El
+# estado son los últimos 3 valores de temperatura, presión y nubosidad: O(1) por registro y memoria fija.
+import sys, json, time, argparse, numpy as np, pandas as pd
+from collections import deque
+from features import COLS, RAW, cyclic
+from modelo import load_model
+
+HOUR = pd.Timedelta(hours=1)
+
+class OnlineFeatures:
+    """Produce la fila de COLS de cada hora igual que build_features, pero un registro a la vez."""
+    def __init__(self):
+        self.prev = None
+        self.temp, self.pres, self.cloud = deque(maxlen=3), deque(maxlen=3), deque(maxlen=3)
+
+    def update(self, rec):
+        """Devuelve (timestamp, x) o (timestamp, None) si aún no hay 3 horas previas contiguas."""
+        t = pd.Timestamp(rec["timestamp"])
+        if self.prev is not None and t <= self.prev: return t, None          # repetido o fuera de orden
+        if self.prev is None or t - self.prev != HOUR:                      # hueco: los lags ya no aplican
+            self.temp.clear(); self.pres.clear(); self.cloud.clear()
+        self.prev = t
+        v = dict(zip(RAW, (float(rec[c]) if rec.get(c) not in (None, "") else np.nan for c in RAW)))
+        s, p, c = v["temperature_2m"], v["pressure_msl"], v["cloud_cover"]
+        x = None
+        if len(self.temp) == 3:
+            x = np.empty(len(COLS))
+            x[:6] = cyclic([t])[0]
+            x[6:13] = [v[k] for k in RAW[1:]]
+            x[13:16] = self.temp[-1], self.temp[-2], self.temp[-3]
+            x[16] = (s + self.temp[-1] + self.temp[-2]) / 3
+            x[17], x[18] = p - self.pres[0], c - self.cloud[0]
+            x[19] = s - v["dew_point_2m"]
+            if np.isnan(x).any(): x = None
+        self.temp.append(s); self.pres.append(p); self.cloud.append(c)
+        return t, x
+
+def records(f, follow=False):
+    """Registros de un CSV con encabezado o de JSON por línea; con follow espera líneas nuevas (tail -f)."""
+    header = None
+    while True:
+        line = f.readline()
+        if not line:
+            if not follow: return
+            time.sleep(0.5); continue
+        line = line.strip()
+        if not line: continue
+        if line.startswith("{"): yield json.loads(line)
+        elif header is None: header = line.split(",")
+        else: yield dict(zip(header, line.split(",")))
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("archivo", help="CSV/JSONL de observaciones o - para stdin")
+    ap.add_argument("--seguir", action="store_true", help="seguir leyendo cuando el archivo crece")
+    ap.add_argument("--salida", help="CSV donde agregar las predicciones (por defecto stdout)")
+    ap.add_argument("--modelo", default="modelo_temp")
+    a = ap.parse_args()
+    m = load_model(a.modelo, COLS)
+    feats = OnlineFeatures()
+    out = open(a.salida, "a") if a.salida else sys.stdout
+    if out is sys.stdout or out.tell() == 0: out.write("timestamp,pred_temperature_2m,real_temperature_2m\n")
+    src = sys.stdin if a.archivo == "-" else open(a.archivo)
+    for rec in records(src, a.seguir):
+        t, x = feats.update(rec)
+        if x is None: continue
+        out.write(f"{t:%Y-%m-%dT%H:%M},{m.predict(x[None])[0]:.3f},{rec.get('temperature_2m', '')}\n"); out.flush()
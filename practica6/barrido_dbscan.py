@@ -0,0 +1,158 @@
+# barrido_dbscan.py
+# Barrido de eps y min_samples de DBSCAN con una sola búsqueda de vecinos.
+# El grafo de vecinos por radio se construye una vez con el eps más grande; para cada eps menor sólo se
+# filtran sus aristas (distancia <= eps). Las etiquetas se obtienen del grafo igual que DBSCAN de sklearn
+# y cada combinación se evalúa con compute_metrics en un pool de procesos que abre el grafo con mmap.
+#
+# Uso:
+#   python barrido_dbscan.py blobs [--eps-min 0.1 --eps-max 0.5 --n-eps 10 --min-samples 3 5 8 10 15]
+#                                  [--procesos 4]
+#   (datasets: iris, mall, moons, blobs; la tabla se guarda en figs/barrido_<dataset>.csv)
+
+import os
+import argparse
+import tempfile
+import numpy as np
+import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import StandardScaler
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from clustering import compute_metrics, load_dataset
+
+plt.rcParams["figure.dpi"] = 140
+os.makedirs("figs", exist_ok=True)
+
+# --------------------------
+# Grafo de vecinos y etiquetas
+# --------------------------
+def radius_graph(X, eps_max):
+    """
+    Grafo CSR (indptr, indices, dist) de vecinos a distancia <= eps_max de cada punto,
+    incluyendo al propio punto (igual que DBSCAN al contar min_samples).
+    """
+    nn = NearestNeighbors(radius=eps_max).fit(X)
+    dist, ind = nn.radius_neighbors(X, return_distance=True)
+    indptr = np.concatenate([[0], np.cumsum([len(i) for i in ind])])
+    return indptr, np.concatenate(ind), np.concatenate(dist)
+
+def labels_from_graph(indptr, indices, dist, eps, min_samples):
+    """
+    Mismas etiquetas que DBSCAN(eps, min_samples).fit_predict, usando sólo las aristas con dist <= eps.
+    Los clusters se numeran por su punto núcleo de menor índice y cada punto borde queda en el cluster
+    de menor número entre sus núcleos vecinos (el primero que lo alcanza en la expansión de sklearn).
+    """
+    n = len(indptr) - 1
+    keep = dist <= eps
+    row = np.repeat(np.arange(n), np.diff(indptr))[keep]
+    col = indices[keep]
+    core = np.bincount(row, minlength=n) >= min_samples
+
+    cc = core[row] & core[col]
+    graph = csr_matrix((np.ones(cc.sum(), dtype=np.int8), (row[cc], col[cc])), shape=(n, n))
+    _, comp = connected_components(graph, directed=False)
+
+    labels = np.full(n, -1)
+    ci = np.flatnonzero(core)
+    uniq, first = np.unique(comp[ci], return_index=True)
+    number = np.full(comp.max() + 1, -1)
+    number[uniq[np.argsort(first)]] = np.arange(len(uniq))
+    labels[ci] = number[comp[ci]]
+
+    b = ~core[row] & core[col]
+    border = np.full(n, np.iinfo(np.int64).max)
+    np.minimum.at(border, row[b], labels[col[b]])
+    has = border != np.iinfo(np.int64).max
+    labels[has] = border[has]
+    return labels
+
+# --------------------------
+# Evaluación en paralelo
+# --------------------------
+_shared = None
+
+def _init(d):
+    global _shared
+    _shared = {k: np.load(os.path.join(d, f"{k}.npy"), mmap_mode="r")
+               for k in ("X", "indptr", "indices", "dist")}
+
+def _evaluate(job):
+    eps, min_samples = job
+    s = _shared
+    labels = labels_from_graph(s["indptr"], s["indices"], s["dist"], eps, min_samples)
+    return {"eps": eps, "min_samples": min_samples, **compute_metrics(np.asarray(s["X"]), labels)}
+
+def sweep_dbscan(X, eps_values, min_samples_values, standardize=True, workers=None):
+    """
+    Evalúa todas las combinaciones (eps, min_samples) y devuelve una lista de dicts con las métricas
+    de compute_metrics. La búsqueda de vecinos se hace una sola vez con max(eps_values).
+    """
+    Xp = StandardScaler().fit_transform(X) if standardize else np.asarray(X, dtype=float)
+    indptr, indices, dist = radius_graph(Xp, max(eps_values))
+    jobs = [(float(e), int(m)) for e in eps_values for m in min_samples_values]
+    with tempfile.TemporaryDirectory() as d:
+        for k, a in (("X", Xp), ("indptr", indptr), ("indices", indices), ("dist", dist)):
+            np.save(os.path.join(d, f"{k}.npy"), a)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(d,)) as ex:
+            return list(ex.map(_evaluate, jobs))
+
+# --------------------------
+# Tabla y gráfica
+# --------------------------
+def save_table(results, path):
+    cols = ["eps", "min_samples", "n_clusters", "n_noise", "silhouette", "calinski_harabasz", "davies_bouldin"]
+    with open(path, "w") as f:
+        f.write(",".join(cols) + "\n")
+        for r in results:
+            f.write(",".join("" if r[c] is None else str(r[c]) for c in cols) + "\n")
+    print(f"Guardada: {path}")
+
+def plot_sweep(results, eps_values, min_samples_values, title, filename):
+    """
+    Mapa de calor de la silueta por (eps, min_samples); las celdas sin métrica (<2 clusters) quedan en blanco.
+    """
+    S = np.full((len(min_samples_values), len(eps_values)), np.nan)
+    for r in results:
+        if r["silhouette"] is not None:
+            S[list(min_samples_values).index(r["min_samples"]), list(eps_values).index(r["eps"])] = r["silhouette"]
+    plt.figure()
+    plt.imshow(S, origin="lower", aspect="auto", cmap="viridis")
+    plt.colorbar(label="Coeficiente de Silueta")
+    plt.xticks(range(len(eps_values)), [f"{e:.2f}" for e in eps_values], rotation=90, fontsize=6)
+    plt.yticks(range(len(min_samples_values)), min_samples_values, fontsize=7)
+    plt.xlabel("eps")
+    plt.ylabel("min_samples")
+    plt.title(title)
+    plt.tight_layout()
+    outpath = os.path.join("figs", filename)
+    plt.savefig(outpath)
+    plt.close()
+    print(f"Guardada: {outpath}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset", choices=["iris", "mall", "moons", "blobs"])
+    ap.add_argument("--eps-min", type=float, default=0.10)
+    ap.add_argument("--eps-max", type=float, default=0.50)
+    ap.add_argument("--n-eps", type=int, default=10)
+    ap.add_argument("--min-samples", type=int, nargs="+", default=[3, 5, 8, 10, 15])
+    ap.add_argument("--procesos", type=int)
+    a = ap.parse_args()
+
+    name, X = load_dataset(a.dataset)
+    eps_values = [float(e) for e in np.round(np.linspace(a.eps_min, a.eps_max, a.n_eps), 4)]
+    results = sweep_dbscan(X, eps_values, a.min_samples, workers=a.procesos)
+
+    save_table(results, os.path.join("figs", f"barrido_{a.dataset}.csv"))
+    plot_sweep(results, eps_values, a.min_samples, f"{name} — barrido DBSCAN", f"barrido_{a.dataset}.png")
+
+    valid = [r for r in results if r["silhouette"] is not None]
+    print(f"\n=== {name} | {len(results)} combinaciones, 1 búsqueda de vecinos (eps <= {max(eps_values)}) ===")
+    for r in sorted(valid, key=lambda r: -r["silhouette"])[:5]:
+        print(f"eps={r['eps']:.3f}  min_samples={r['min_samples']:>3}  clusters={r['n_clusters']:>2}  ruido={r['n_noise']:>4}  "
+              f"silueta={r['silhouette']:.4f}  CH={r['calinski_harabasz']:.1f}  DB={r['davies_bouldin']:.4f}")
+    if not valid:
+        print("Ninguna combinación dio 2 o más clusters; amplía el rango de eps.")
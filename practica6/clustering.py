@@ -8,7 +8,8 @@ import matplotlib.pyplot as plt
 from sklearn.datasets import load_iris, make_moons, make_blobs
 from sklearn.preprocessing import StandardScaler
 from sklearn.cluster import DBSCAN
-from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+
+from metricas import silhouette_exact, silhouette_sampled, ch_db
 
 plt.rcParams["figure.dpi"] = 140
 os.makedirs("figs", exist_ok=True)
@@ -16,10 +17,12 @@ os.makedirs("figs", exist_ok=True)
 # --------------------------
 # Utilidades de métricas/plot
 # --------------------------
-def compute_metrics(X, labels):
+def compute_metrics(X, labels, silhouette="auto", max_exact=50_000, sample_size=10_000, seed=0):
     """
     Calcula Silueta, Calinski-Harabasz y Davies-Bouldin excluyendo el ruido (-1).
     Devuelve dict con None cuando no aplican (p.ej., <2 clusters válidos).
+    silhouette: "exacta" (por bloques, memoria acotada), "muestra" (estratificada por cluster, con
+    intervalo de confianza del 95% en "silhouette_ic") o "auto" (exacta hasta max_exact puntos).
     """
     mask = labels != -1
     labels_nonoise = labels[mask]
@@ -30,27 +33,34 @@ def compute_metrics(X, labels):
         "n_clusters": int(len(unique_clusters)),
         "n_noise": int(np.sum(labels == -1)),
         "silhouette": None,
+        "silhouette_ic": None,
         "calinski_harabasz": None,
         "davies_bouldin": None,
     }
 
     if X_nonoise.shape[0] > 0 and len(unique_clusters) >= 2:
-        result["silhouette"] = float(silhouette_score(X_nonoise, labels_nonoise))
-        result["calinski_harabasz"] = float(calinski_harabasz_score(X_nonoise, labels_nonoise))
-        result["davies_bouldin"] = float(davies_bouldin_score(X_nonoise, labels_nonoise))
+        if silhouette == "muestra" or (silhouette == "auto" and X_nonoise.shape[0] > max_exact):
+            est, ic, _ = silhouette_sampled(X_nonoise, labels_nonoise, sample_size, seed=seed)
+            result["silhouette"], result["silhouette_ic"] = est, ic
+        else:
+            result["silhouette"] = silhouette_exact(X_nonoise, labels_nonoise)
+        result["calinski_harabasz"], result["davies_bouldin"] = ch_db(X_nonoise, labels_nonoise)
 
     return result
 
 def print_metrics_es(m):
     """
     Imprime las métrricas con el formato exacto solicitado (4 decimales).
+    Si la silueta se estimó por muestra se agrega su intervalo de confianza.
     """
     if m["silhouette"] is None:
         print("Coeficiente de Silueta: N/A")
         print("Índice de Calinski-Harabasz: N/A")
         print("Índice de Davies-Bouldin: N/A")
     else:
-        print(f"Coeficiente de Silueta: {m['silhouette']:.4f}")
+        ic = m.get("silhouette_ic")
+        extra = f" (muestra, IC 95%: {ic[0]:.4f} – {ic[1]:.4f})" if ic else ""
+        print(f"Coeficiente de Silueta: {m['silhouette']:.4f}{extra}")
         print(f"Índice de Calinski-Harabasz: {m['calinski_harabasz']:.4f}")
         print(f"Índice de Davies-Bouldin: {m['davies_bouldin']:.4f}")
 
@@ -77,15 +87,32 @@ def plot_dbscan(X2d, labels, title, filename):
     plt.close()
     print(f"Guardada: {outpath}")
 
-def run_dbscan_dataset(name, X, eps, min_samples, standardize=True, filename_suffix=""):
+def run_dbscan_dataset(name, X, eps, min_samples, standardize=True, filename_suffix="", tesela=None):
     """
     Estandariza, ejecuta DBSCAN, imprime métricas y grafica en 2D (usando las 2 primeras features de X).
+    tesela: None usa sklearn con todo en memoria; un número (o "auto") usa DBSCAN por teselas
+    (dbscan_teselas.py), que da los mismos clusters con memoria acotada para millones de puntos.
+    eps="auto" lo estima con la curva de k-distancias (eps_automatico.py, ver stable_eps) y guarda la curva en
+    figs/kdist_<sufijo>.png; sin tesela ajusta DBSCAN con el mismo KDTree, con tesela el eps elegido pasa
+    a dbscan_tiled (la curva sí necesita todos los puntos en memoria).
     """
     Xp = StandardScaler().fit_transform(X) if standardize else X
-    db = DBSCAN(eps=eps, min_samples=min_samples)
-    labels = db.fit_predict(Xp)
-
-    print(f"\n=== {name} | DBSCAN(eps={eps}, min_samples={min_samples}) ===")
+    labels = None
+    if eps == "auto":
+        from eps_automatico import estimate_eps, dbscan_auto_eps
+        args = (Xp, min_samples, f"{name} — k-distancias (k={min_samples})", f"kdist_{filename_suffix}.png")
+        if tesela is None: labels, eps = dbscan_auto_eps(*args)
+        else: eps, _ = estimate_eps(*args)
+        eps = round(eps, 4)
+    if labels is None and tesela is None:
+        db = DBSCAN(eps=eps, min_samples=min_samples)
+        labels = db.fit_predict(Xp)
+    elif labels is None:
+        from dbscan_teselas import dbscan_tiled
+        labels = dbscan_tiled(Xp, eps, min_samples, tile=None if tesela == "auto" else tesela,
+                              standardize=False, verbose=False)
+
+    print(f"\n=== {name} | DBSCAN(eps={eps}, min_samples={min_samples}{', por teselas' if tesela is not None else ''}) ===")
     m = compute_metrics(Xp, labels)
     print(f"Clusters detectados (sin ruido): {m['n_clusters']}  |  Puntos de ruido: {m['n_noise']}")
     print_metrics_es(m)
@@ -93,22 +120,8 @@ def run_dbscan_dataset(name, X, eps, min_samples, standardize=True, filename_suf
     X2d = Xp[:, :2]  # para visualización
     plot_dbscan(X2d, labels, f"{name} — DBSCAN", f"dbscan_{filename_suffix}.png")
 
-# --------------------------
-# 1) IRIS (pétalo largo/ancho)
-# --------------------------
-iris = load_iris()
-X_iris = iris.data[:, [2, 3]]  # petal length, petal width
-run_dbscan_dataset(
-    name="Iris (pétalo largo/ancho)",
-    X=X_iris,
-    eps=0.30,
-    min_samples=5,
-    standardize=True,
-    filename_suffix="iris"
-)
-
 # -----------------------------------
-# 2) MALL CUSTOMERS (ingreso vs gasto)
+# Carga de Mall Customers
 # -----------------------------------
 def load_mall_customers_X(path_candidates=("Mall_Customers.csv", "mall_customers.csv")):
     """
@@ -161,45 +174,73 @@ def load_mall_customers_X(path_candidates=("Mall_Customers.csv", "mall_customers
         ])
         return Xsyn
 
-X_mall = load_mall_customers_X()
-run_dbscan_dataset(
-    name="Mall Customers (Ingreso vs Gasto)",
-    X=X_mall,
-    eps=0.25,
-    min_samples=5,
-    standardize=True,
-    filename_suffix="mall"
-)
-
-# --------------------------
-# 3) MOONS (no convexos)
-# --------------------------
-X_moons, y_moons = make_moons(n_samples=800, noise=0.05, random_state=42)
-run_dbscan_dataset(
-    name="Moons",
-    X=X_moons,
-    eps=0.25,
-    min_samples=5,
-    standardize=True,
-    filename_suffix="moons"
-)
-
-# --------------------------
-# 4) BLOBS (clusters esféricos)
-# --------------------------
-X_blobs, y_blobs = make_blobs(
-    n_samples=600,
-    centers=4,
-    cluster_std=[0.60, 0.50, 0.60, 0.55],
-    random_state=42
-)
-run_dbscan_dataset(
-    name="Blobs (4 centros)",
-    X=X_blobs,
-    eps=0.25,       # ajusta entre 0.22–0.30 si ves unión/exceso de ruido
-    min_samples=5,
-    standardize=True,
-    filename_suffix="blobs"
-)
-
-print("\nListo. Revisa la carpeta ./figs para las imágenes y esta consola para las métricas.")
+def load_dataset(key):
+    """
+    Devuelve (nombre, X) de los datasets de la práctica: "iris", "mall", "moons" o "blobs",
+    con los mismos parámetros que usa el script principal.
+    """
+    if key == "iris":
+        return "Iris (pétalo largo/ancho)", load_iris().data[:, [2, 3]]  # petal length, petal width
+    if key == "mall":
+        return "Mall Customers (Ingreso vs Gasto)", load_mall_customers_X()
+    if key == "moons":
+        return "Moons", make_moons(n_samples=800, noise=0.05, random_state=42)[0]
+    if key == "blobs":
+        X, _ = make_blobs(n_samples=600, centers=4, cluster_std=[0.60, 0.50, 0.60, 0.55], random_state=42)
+        return "Blobs (4 centros)", X
+    raise ValueError(f"Dataset desconocido: {key}")
+
+if __name__ == "__main__":
+    # --------------------------
+    # 1) IRIS (pétalo largo/ancho)
+    # --------------------------
+    name_iris, X_iris = load_dataset("iris")
+    run_dbscan_dataset(
+        name=name_iris,
+        X=X_iris,
+        eps=0.30,
+        min_samples=5,
+        standardize=True,
+        filename_suffix="iris"
+    )
+
+    # -----------------------------------
+    # 2) MALL CUSTOMERS (ingreso vs gasto)
+    # -----------------------------------
+    name_mall, X_mall = load_dataset("mall")
+    run_dbscan_dataset(
+        name=name_mall,
+        X=X_mall,
+        eps=0.25,
+        min_samples=5,
+        standardize=True,
+        filename_suffix="mall"
+    )
+
+    # --------------------------
+    # 3) MOONS (no convexos)
+    # --------------------------
+    name_moons, X_moons = load_dataset("moons")
+    run_dbscan_dataset(
+        name=name_moons,
+        X=X_moons,
+        eps=0.25,
+        min_samples=5,
+        standardize=True,
+        filename_suffix="moons"
+    )
+
+    # --------------------------
+    # 4) BLOBS (clusters esféricos)
+    # --------------------------
+    name_blobs, X_blobs = load_dataset("blobs")
+    run_dbscan_dataset(
+        name=name_blobs,
+        X=X_blobs,
+        eps=0.25,       # ajusta entre 0.22–0.30 si ves unión/exceso de ruido (o usa barrido_dbscan.py)
+        min_samples=5,
+        standardize=True,
+        filename_suffix="blobs"
+    )
+
+    print("\nListo. Revisa la carpeta ./figs para las imágenes y esta consola para las métricas.")
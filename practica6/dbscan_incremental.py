@@ -0,0 +1,258 @@
+# dbscan_incremental.py
+# DBSCAN incremental: insertar y borrar puntos sin volver a agrupar todo el conjunto.
+# Los puntos viven en una rejilla (dict celda -> ids) con celdas de lado eps, así los vecinos a distancia
+# <= eps de un punto están en sus 3^d celdas vecinas. Cada punto guarda cuántos vecinos tiene (él incluido)
+# y cada punto núcleo su cluster; los bordes y el ruido se resuelven al consultarlos.
+#  - Insertar: sólo pueden volverse núcleo el punto nuevo y sus vecinos; cada núcleo nuevo toma el cluster
+#    de sus vecinos núcleo y, si toca varios, se unen (el cluster chico se renombra al grande).
+#  - Borrar: sólo pueden dejar de ser núcleo el punto y sus vecinos. Si alguno deja de serlo, su cluster
+#    puede partirse: desde los núcleos vecinos se recorre el cluster y se para en cuanto todos se alcanzan;
+#    sólo si no se alcanzan se separa la parte recorrida con un cluster nuevo.
+# Las particiones (núcleos y ruido) coinciden con DBSCAN de sklearn sobre los puntos vigentes; los números
+# de cluster pueden ser otros y un punto borde entre dos clusters queda en el de número menor.
+#
+# Uso:
+#   python dbscan_incremental.py [--eps 0.25 --min-samples 5 --inicial 0.8]
+#   (agrupa una parte de Mall Customers, inserta el resto de uno en uno, borra algunos y compara)
+
+import time
+import argparse
+import itertools
+import numpy as np
+
+from sklearn.cluster import DBSCAN
+from sklearn.preprocessing import StandardScaler
+
+# --------------------------
+# DBSCAN incremental
+# --------------------------
+class IncrementalDBSCAN:
+    """
+    DBSCAN con inserción y borrado de puntos. Los puntos se identifican con el id que devuelve insert.
+    scaler: StandardScaler ya ajustado (o None) que se aplica a cada punto que entra.
+    """
+    def __init__(self, eps, min_samples=5, scaler=None):
+        self.eps, self.min_samples = float(eps), int(min_samples)
+        self.mean = None if scaler is None else np.asarray(scaler.mean_, dtype=float)
+        self.scale = None if scaler is None else np.asarray(scaler.scale_, dtype=float)
+        self.points = {}     # id -> tupla de coordenadas (ya escaladas)
+        self.cell_of = {}    # id -> celda
+        self.grid = {}       # celda -> set de ids
+        self.count = {}      # id -> vecinos a distancia <= eps (él incluido)
+        self.cluster = {}    # id de núcleo -> número de cluster
+        self.members = {}    # número de cluster -> set de ids núcleo
+        self._next_id = 0
+        self._next_cluster = 0
+        self._offsets = None
+
+    # --- rejilla y vecinos ---
+    def _prepare(self, x):
+        x = np.asarray(x, dtype=float)
+        if self.mean is not None:
+            x = (x - self.mean) / self.scale
+        return tuple(float(v) for v in x)
+
+    def _cell(self, p):
+        return tuple(int(np.floor(v / self.eps)) for v in p)
+
+    def _neighbors(self, p, cell=None):
+        """Ids a distancia <= eps de las coordenadas p (incluye a p si ya está insertado)."""
+        if self._offsets is None:
+            self._offsets = list(itertools.product((-1, 0, 1), repeat=len(p)))
+        cell = self._cell(p) if cell is None else cell
+        e2 = self.eps * self.eps
+        out = []
+        for off in self._offsets:
+            ids = self.grid.get(tuple(c + o for c, o in zip(cell, off)))
+            if not ids:
+                continue
+            for j in ids:
+                q = self.points[j]
+                if sum((a - b) * (a - b) for a, b in zip(p, q)) <= e2:
+                    out.append(j)
+        return out
+
+    def _is_core(self, i):
+        return self.count[i] >= self.min_samples
+
+    # --- clusters de núcleos ---
+    def _new_cluster(self, ids):
+        c = self._next_cluster
+        self._next_cluster += 1
+        self.members[c] = set(ids)
+        for i in ids:
+            self.cluster[i] = c
+        return c
+
+    def _merge(self, labels):
+        """Une los clusters de labels en el más grande y devuelve su número."""
+        target = max(labels, key=lambda c: len(self.members[c]))
+        for c in labels:
+            if c != target:
+                for i in self.members[c]:
+                    self.cluster[i] = target
+                self.members[target] |= self.members.pop(c)
+        return target
+
+    def _attach(self, i):
+        """Da cluster al núcleo nuevo i según sus vecinos núcleo ya etiquetados."""
+        labels = {self.cluster[j] for j in self._neighbors(self.points[i], self.cell_of[i]) if j in self.cluster}
+        if not labels:
+            self._new_cluster([i])
+            return
+        c = self._merge(labels)
+        self.cluster[i] = c
+        self.members[c].add(i)
+
+    def _split(self, c, seeds):
+        """
+        Tras perder núcleos, revisa si el cluster c sigue conexo. seeds son sus núcleos vecinos de los que
+        se perdieron: cada recorrido para en cuanto alcanza a todas las semillas pendientes.
+        """
+        pending = set(s for s in seeds if self.cluster.get(s) == c)
+        while len(pending) > 1:
+            start = pending.pop()
+            seen, stack = {start}, [start]
+            while stack and pending:
+                i = stack.pop()
+                for j in self._neighbors(self.points[i], self.cell_of[i]):
+                    if j not in seen and self.cluster.get(j) == c:
+                        seen.add(j)
+                        pending.discard(j)
+                        stack.append(j)
+            if pending and not stack:      # componente cerrada sin tocar a las demás: se separa
+                self.members[c] -= seen
+                self._new_cluster(seen)
+            else:
+                return
+
+    # --- API ---
+    def insert(self, x):
+        """Agrega un punto; devuelve (id, etiqueta)."""
+        p = self._prepare(x)
+        i = self._next_id
+        self._next_id += 1
+        cell = self._cell(p)
+        self.points[i], self.cell_of[i] = p, cell
+        self.grid.setdefault(cell, set()).add(i)
+
+        nb = self._neighbors(p, cell)
+        self.count[i] = len(nb)
+        new_cores = [i] if self._is_core(i) else []
+        for j in nb:
+            if j != i:
+                self.count[j] += 1
+                if self.count[j] == self.min_samples:
+                    new_cores.append(j)
+        for j in new_cores:
+            self._attach(j)
+        return i, self.label(i)
+
+    def delete(self, i):
+        """Quita el punto i y actualiza los clusters alrededor."""
+        p, cell = self.points[i], self.cell_of[i]
+        nb = [j for j in self._neighbors(p, cell) if j != i]
+        lost = [i] if i in self.cluster else []
+        self.grid[cell].discard(i)
+        if not self.grid[cell]:
+            del self.grid[cell]
+        del self.points[i], self.cell_of[i], self.count[i]
+        for j in nb:
+            self.count[j] -= 1
+            if self.count[j] == self.min_samples - 1 and j in self.cluster:
+                lost.append(j)
+
+        seeds = {}
+        for j in lost:
+            c = self.cluster.pop(j)
+            self.members[c].discard(j)
+            seeds.setdefault(c, set())
+        for j in lost:   # núcleos que quedan junto a los perdidos: por ahí podría partirse el cluster
+            around = nb if j == i else self._neighbors(self.points[j], self.cell_of[j])
+            for k in around:
+                if k in self.cluster:
+                    seeds[self.cluster[k]].add(k)
+        for c, s in seeds.items():
+            if not self.members[c]:
+                del self.members[c]
+            else:
+                self._split(c, s)
+
+    def label(self, i):
+        """Etiqueta del punto i: su cluster si es núcleo, el menor de sus vecinos núcleo si es borde, o -1."""
+        if i in self.cluster:
+            return self.cluster[i]
+        labels = [self.cluster[j] for j in self._neighbors(self.points[i], self.cell_of[i]) if j in self.cluster]
+        return min(labels) if labels else -1
+
+    def predict(self, x):
+        """Segmento de un punto nuevo sin insertarlo: como si fuera borde (o ruido) del estado actual."""
+        labels = [self.cluster[j] for j in self._neighbors(self._prepare(x)) if j in self.cluster]
+        return min(labels) if labels else -1
+
+    def fit(self, X):
+        """Inserta todas las filas de X; devuelve la lista de ids."""
+        return [self.insert(x)[0] for x in X]
+
+    def labels(self, ids=None):
+        """Arreglo de etiquetas de ids (por defecto todos los puntos vigentes, en orden de inserción)."""
+        ids = sorted(self.points) if ids is None else ids
+        return np.array([self.label(i) for i in ids], dtype=int)
+
+    def __len__(self):
+        return len(self.points)
+
+# --------------------------
+# Comparación contra DBSCAN completo
+# --------------------------
+def same_partition(a, b):
+    """True si a y b separan igual los puntos (mismos grupos y mismo ruido, sin importar los números)."""
+    a, b = np.asarray(a), np.asarray(b)
+    if not np.array_equal(a == -1, b == -1):
+        return False
+    pairs = set(zip(a[a != -1], b[b != -1]))
+    return len(pairs) == len({x for x, _ in pairs}) == len({y for _, y in pairs})
+
+if __name__ == "__main__":
+    from clustering import load_dataset
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--eps", type=float, default=0.25)
+    ap.add_argument("--min-samples", type=int, default=5)
+    ap.add_argument("--inicial", type=float, default=0.8, help="fracción agrupada al inicio")
+    ap.add_argument("--borrar", type=int, default=20, help="clientes que se dan de baja al final")
+    a = ap.parse_args()
+
+    name, X = load_dataset("mall")
+    rng = np.random.RandomState(0)
+    X = X[rng.permutation(len(X))]
+    n0 = int(len(X) * a.inicial)
+    scaler = StandardScaler().fit(X[:n0])    # la escala se fija con los clientes iniciales
+
+    inc = IncrementalDBSCAN(a.eps, a.min_samples, scaler)
+    t = time.perf_counter()
+    ids = inc.fit(X[:n0])
+    print(f"\n=== {name} | DBSCAN incremental (eps={a.eps}, min_samples={a.min_samples}) ===")
+    print(f"Inicial: {n0} clientes en {1000 * (time.perf_counter() - t):.1f} ms")
+
+    t_pred, t_ins = [], []
+    for x in X[n0:]:
+        t = time.perf_counter(); inc.predict(x); t_pred.append(time.perf_counter() - t)
+        t = time.perf_counter(); ids.append(inc.insert(x)[0]); t_ins.append(time.perf_counter() - t)
+    print(f"Llegan {len(X) - n0} clientes: asignar {1e6 * np.median(t_pred):.0f} µs (mediana), "
+          f"insertar {1e6 * np.median(t_ins):.0f} µs (mediana), {1e3 * np.max(t_ins):.2f} ms (máx)")
+
+    gone = set(rng.choice(len(ids), min(a.borrar, len(ids)), replace=False).tolist())
+    t = time.perf_counter()
+    for k in gone:
+        inc.delete(ids[k])
+    print(f"Bajas: {len(gone)} clientes en {1000 * (time.perf_counter() - t):.2f} ms")
+
+    keep = [k for k in range(len(ids)) if k not in gone]
+    t = time.perf_counter()
+    ref = DBSCAN(eps=a.eps, min_samples=a.min_samples).fit_predict(scaler.transform(X[keep]))
+    print(f"DBSCAN completo de referencia: {1000 * (time.perf_counter() - t):.1f} ms")
+    lab = inc.labels([ids[k] for k in keep])
+    core = np.array([ids[k] in inc.cluster for k in keep])
+    print(f"Clusters: {len(inc.members)}  |  Ruido: {int((lab == -1).sum())}  |  "
+          f"misma partición de núcleos y ruido que sklearn: {same_partition(np.where(core, lab, -1), np.where(core, ref, -1)) and np.array_equal(lab == -1, ref == -1)}")
@@ -0,0 +1,251 @@
+# dbscan_teselas.py
+# DBSCAN fuera de memoria para millones de puntos en 2-D (o pocas dimensiones).
+# Los puntos se leen por bloques desde un .npy (memmap), se estandarizan y se reparten en teselas de una
+# rejilla; cada tesela se procesa junto con su halo (los puntos de las teselas vecinas a menos de eps de
+# su borde) usando un KD-tree. Los clusters que cruzan bordes de teselas se unen al final (componentes
+# conexas sobre los ids locales), así que la memoria depende de la tesela más densa y no del total.
+#
+# Uso:
+#   python dbscan_teselas.py --generar 20000000 puntos.npy            (blobs sintéticos para probar)
+#   python dbscan_teselas.py puntos.npy --eps 0.02 --min-samples 5 [--tesela 0.5] [--salida etiquetas.npy]
+
+import os
+import time
+import argparse
+import tempfile
+import itertools
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# --------------------------
+# Utilidades
+# --------------------------
+def _blocks(n, size):
+    for s in range(0, n, size):
+        yield s, min(s + size, n)
+
+def stream_stats(X, standardize=True, chunk=1_000_000):
+    """
+    Una pasada por bloques: media/desviación (para estandarizar como StandardScaler) y caja envolvente
+    de los datos ya estandarizados.
+    """
+    d = X.shape[1]
+    n, s1, s2 = 0, np.zeros(d), np.zeros(d)
+    mn, mx = np.full(d, np.inf), np.full(d, -np.inf)
+    for s, e in _blocks(len(X), chunk):
+        B = np.asarray(X[s:e], dtype=float)
+        n += len(B); s1 += B.sum(0); s2 += (B**2).sum(0)
+        mn, mx = np.minimum(mn, B.min(0)), np.maximum(mx, B.max(0))
+    if standardize:
+        mean = s1 / n
+        std = np.sqrt(np.maximum(s2 / n - mean**2, 0))
+        std[std == 0] = 1.0
+    else:
+        mean, std = np.zeros(d), np.ones(d)
+    return mean, std, (mn - mean) / std, (mx - mean) / std
+
+def tile_counts(X, mean, std, lo, hi, tile, chunk=1_000_000):
+    """Puntos por tesela (arreglo denso sobre la rejilla) y forma de la rejilla, en una pasada por bloques."""
+    shape = tuple((np.floor((hi - lo) / tile) + 1).astype(int))
+    if np.prod(shape, dtype=float) > 5e7:
+        raise ValueError(f"Demasiadas teselas {shape}; usa una tesela más grande.")
+    counts = np.zeros(int(np.prod(shape)), dtype=np.int64)
+    for s, e in _blocks(len(X), chunk):
+        c = np.floor(((np.asarray(X[s:e], dtype=float) - mean) / std - lo) / tile).astype(np.int64)
+        counts += np.bincount(np.ravel_multi_index(np.clip(c, 0, np.array(shape) - 1).T, shape), minlength=len(counts))
+    return counts, shape
+
+def auto_tile(X, mean, std, lo, hi, eps, target=200_000, chunk=1_000_000):
+    """
+    Lado de tesela: parte del que daría ~`target` puntos por tesela con datos uniformes y lo reduce a la
+    mitad mientras alguna tesela pase de `target` (sin bajar de 4*eps). Devuelve (lado, conteos, forma).
+    """
+    n = len(X)
+    tile = float(max((np.prod(np.maximum(hi - lo, eps)) * target / n) ** (1 / len(lo)), 4 * eps))
+    counts, shape = tile_counts(X, mean, std, lo, hi, tile, chunk)
+    while counts.max() > target and tile / 2 >= 4 * eps:
+        tile /= 2
+        counts, shape = tile_counts(X, mean, std, lo, hi, tile, chunk)
+    return tile, counts, shape
+
+# --------------------------
+# Reparto en teselas (en disco)
+# --------------------------
+class Tiles:
+    """
+    Puntos estandarizados ordenados por tesela en memmaps de `workdir`:
+      Z (n, d) coordenadas, orig (n,) índice en X. La tesela i ocupa las filas start[i]:start[i+1].
+    """
+    def __init__(self, X, mean, std, lo, tile, counts, shape, workdir, chunk=1_000_000):
+        n, d = X.shape
+        self.lo, self.tile, self.d, self.shape = lo, tile, d, shape
+        self.keys = np.flatnonzero(counts)                       # sólo teselas no vacías
+        self.start = np.concatenate([[0], np.cumsum(counts[self.keys])])
+        self.Z = np.lib.format.open_memmap(os.path.join(workdir, "Z.npy"), "w+", np.float64, (n, d))
+        self.orig = np.lib.format.open_memmap(os.path.join(workdir, "orig.npy"), "w+", np.int64, (n,))
+        cursor = np.zeros(len(counts), dtype=np.int64)
+        cursor[self.keys] = self.start[:-1]
+        for s, e in _blocks(n, chunk):
+            B = (np.asarray(X[s:e], dtype=float) - mean) / std
+            k = self._keys(B)
+            order = np.argsort(k, kind="stable")
+            sk = k[order]
+            uniq, first, cnt = np.unique(sk, return_index=True, return_counts=True)
+            pos = cursor[sk] + np.arange(len(sk)) - np.repeat(first, cnt)
+            self.Z[pos] = B[order]
+            self.orig[pos] = s + order
+            cursor[uniq] += cnt
+
+    def _coords(self, B):
+        return np.clip(np.floor((B - self.lo) / self.tile).astype(np.int64), 0, np.array(self.shape) - 1)
+
+    def _keys(self, B):
+        return np.ravel_multi_index(self._coords(B).T, self.shape)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rows(self, i):
+        return np.arange(self.start[i], self.start[i + 1])
+
+    def neighborhood(self, i, eps):
+        """(filas propias, filas del halo) de la tesela i; el halo son puntos vecinos a <= eps de la caja."""
+        c = np.array(np.unravel_index(self.keys[i], self.shape))
+        box_lo, box_hi = self.lo + c * self.tile - eps, self.lo + (c + 1) * self.tile + eps
+        halo = []
+        for off in itertools.product((-1, 0, 1), repeat=self.d):
+            cc = c + off
+            if not any(off) or (cc < 0).any() or (cc >= self.shape).any():
+                continue
+            j = np.searchsorted(self.keys, np.ravel_multi_index(cc, self.shape))
+            if j < len(self.keys) and self.keys[j] == np.ravel_multi_index(cc, self.shape):
+                r = self.rows(j)
+                P = self.Z[r]
+                halo.append(r[((P >= box_lo) & (P <= box_hi)).all(axis=1)])
+        return self.rows(i), np.concatenate(halo) if halo else np.zeros(0, dtype=np.int64)
+
+# --------------------------
+# DBSCAN por teselas
+# --------------------------
+def _local_components(C, eps, counts, budget):
+    """
+    Componentes conexas de los puntos núcleo C (distancia <= eps). Las aristas se generan por bloques
+    cuyo número esperado de vecinos (counts) no pasa de `budget`, así la memoria no depende de la densidad.
+    """
+    lab = np.arange(len(C))
+    if len(C) < 2:
+        return lab
+    tree = cKDTree(C)
+    cs = np.cumsum(counts)
+    ends = np.unique(np.minimum(np.searchsorted(cs, np.arange(budget, cs[-1], budget)) + 1, len(C)))
+    s = 0
+    for e in np.append(ends[ends < len(C)], len(C)):
+        pairs = cKDTree(C[s:e]).sparse_distance_matrix(tree, eps, output_type="ndarray")
+        a, b = lab[pairs["i"] + s], lab[pairs["j"]]
+        g = coo_matrix((np.ones(len(a), dtype=np.int8), (a, b)), shape=(len(C), len(C)))
+        _, cc = connected_components(g, directed=False)
+        lab = cc[lab]
+        s = e
+    return np.unique(lab, return_inverse=True)[1]
+
+def dbscan_tiled(X, eps, min_samples=5, tile=None, standardize=True, chunk=1_000_000,
+                 budget=1_000_000, workdir=None, out=None, verbose=True):
+    """
+    DBSCAN equivalente a sklearn (mismos puntos núcleo y mismos clusters; un punto borde que toca dos
+    clusters se asigna al del núcleo más cercano) sobre X (ndarray o memmap de .npy).
+    Devuelve las etiquetas (-1 = ruido); con `out` se escriben en ese .npy como memmap.
+    """
+    t0 = time.perf_counter()
+    n = len(X)
+    mean, std, lo, hi = stream_stats(X, standardize, chunk)
+    if tile is None:
+        tile, counts, shape = auto_tile(X, mean, std, lo, hi, eps, chunk=chunk)
+    elif tile < 2 * eps:
+        raise ValueError("La tesela debe medir al menos 2*eps.")
+    else:
+        counts, shape = tile_counts(X, mean, std, lo, hi, tile, chunk)
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        T = Tiles(X, mean, std, lo, tile, counts, shape, tmp, chunk)
+        if verbose:
+            print(f"{n} puntos en {len(T)} teselas de lado {tile:.3f} (máx. {np.diff(T.start).max()} puntos por tesela)")
+        mm = lambda name, dtype: np.lib.format.open_memmap(os.path.join(tmp, name + ".npy"), "w+", dtype, (n,))
+        cnt, anchor, comp = mm("cnt", np.int32), mm("anchor", np.int64), mm("comp", np.int64)
+
+        # Pasada 1: vecinos a <= eps (incluye al propio punto) de cada punto, contando el halo
+        for i in range(len(T)):
+            own, halo = T.neighborhood(i, eps)
+            tree = cKDTree(T.Z[np.concatenate([own, halo])])
+            cnt[own] = tree.query_ball_point(T.Z[own], eps, return_length=True)
+
+        # Pasada 2: componentes de núcleos por tesela (con los núcleos del halo) y núcleo ancla de cada punto
+        next_id, pa, pb = 0, [], []
+        for i in range(len(T)):
+            own, halo = T.neighborhood(i, eps)
+            rows = np.concatenate([own, halo])
+            core = cnt[rows] >= min_samples
+            cr = rows[core]
+            C = T.Z[cr]
+            lab = _local_components(C, eps, cnt[cr].astype(np.int64), budget) + next_id
+            mine = core[:len(own)]
+            comp[own[mine]] = lab[:mine.sum()]
+            pa.append(lab[mine.sum():]); pb.append(cr[mine.sum():])      # núcleo del halo: unir con su dueño
+            next_id = lab.max() + 1 if len(lab) else next_id
+            a = np.full(len(own), -1, dtype=np.int64)
+            a[mine] = own[mine]
+            if len(C) and (~mine).any():
+                dist, j = cKDTree(C).query(T.Z[own[~mine]], k=1, distance_upper_bound=np.nextafter(eps, np.inf))
+                a[~mine] = np.where(np.isfinite(dist), cr[np.minimum(j, len(cr) - 1)], -1)
+            anchor[own] = a
+
+        # Unión entre teselas: cada núcleo del halo conecta su componente local con la de su tesela dueña
+        pa, pb = np.concatenate(pa), np.concatenate(pb)
+        g = coo_matrix((np.ones(len(pa), dtype=np.int8), (pa, comp[pb])), shape=(next_id, next_id))
+        k, final = connected_components(g, directed=False)
+
+        labels = np.lib.format.open_memmap(out, "w+", np.int64, (n,)) if out else np.empty(n, dtype=np.int64)
+        for s, e in _blocks(n, chunk):
+            a = anchor[s:e]
+            lab = np.full(e - s, -1, dtype=np.int64)
+            lab[a >= 0] = final[comp[a[a >= 0]]]
+            labels[T.orig[s:e]] = lab
+        if out:
+            labels.flush()
+    if verbose:
+        print(f"Clusters: {k}  |  Ruido: {int((labels == -1).sum())}  |  {time.perf_counter() - t0:.1f} s")
+    return labels
+
+# --------------------------
+# Datos sintéticos grandes
+# --------------------------
+def generate(n, path, centers=8, chunk=2_000_000, seed=42):
+    """Escribe en path un .npy (n, 2) con blobs gaussianos más 2% de ruido uniforme, por bloques."""
+    rng = np.random.RandomState(seed)
+    C = rng.uniform(-10, 10, size=(centers, 2))
+    S = rng.uniform(0.4, 1.2, size=centers)
+    X = np.lib.format.open_memmap(path, "w+", np.float32, (n, 2))
+    for s, e in _blocks(n, chunk):
+        c = rng.randint(0, centers, e - s)
+        B = C[c] + rng.normal(size=(e - s, 2)) * S[c, None]
+        noise = rng.rand(e - s) < 0.02
+        B[noise] = rng.uniform(-14, 14, size=(noise.sum(), 2))
+        X[s:e] = B
+    X.flush()
+    print(f"Guardado: {path} ({n} puntos)")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("archivo", help=".npy (n, d) con los puntos")
+    ap.add_argument("--generar", type=int, help="crear primero n puntos sintéticos en archivo")
+    ap.add_argument("--eps", type=float, default=0.02)
+    ap.add_argument("--min-samples", type=int, default=5)
+    ap.add_argument("--tesela", type=float, help="lado de la tesela (unidades estandarizadas)")
+    ap.add_argument("--sin-estandarizar", action="store_true")
+    ap.add_argument("--salida", default="etiquetas_dbscan.npy")
+    a = ap.parse_args()
+    if a.generar:
+        generate(a.generar, a.archivo)
+    X = np.load(a.archivo, mmap_mode="r")
+    dbscan_tiled(X, a.eps, a.min_samples, a.tesela, not a.sin_estandarizar, out=a.salida)
+    print(f"Guardadas: {a.salida}")
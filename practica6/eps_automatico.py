@@ -0,0 +1,178 @@
+# eps_automatico.py
+# Elige eps de DBSCAN con la curva de k-distancias y hace el ajuste final con el mismo índice de vecinos.
+#  - Se construye un KDTree una sola vez; con él se consulta la distancia de cada punto a su k-ésimo vecino
+#    (k = min_samples, contando al propio punto igual que DBSCAN) y se ordena de menor a mayor.
+#  - El codo de esa curva (punto más alejado, por debajo, de la recta entre sus extremos una vez normalizada)
+#    suele quedar bajo: con él DBSCAN parte los grupos y deja mucho ruido (Blobs 5 clusters/30 de ruido,
+#    Moons 7 clusters con k=5). Por eso el codo sólo abre el rango de búsqueda, que cierra el codo de la
+#    cola de la curva (lo que queda a la derecha del primero).
+#  - En ese rango se prueban N_CANDIDATOS valores de eps sobre un solo grafo de vecinos y se cuentan los
+#    clusters relevantes (>= 2*min_samples núcleos y >= 1% de los puntos). eps es el mayor valor de la
+#    racha más larga con el mismo número (>= 2) de clusters: la estructura estable con menos ruido.
+#    Si ninguna racha tiene 2 clusters o más, se usa el codo. La curva se guarda en figs/kdist_<sufijo>.png.
+#  - Comportamiento esperado (estandarizado, min_samples=5 / 10):
+#      Iris 2/2 clusters (versicolor y virginica se tocan), Mall 5/5, Moons 2/2, Blobs 4/4,
+#      con 0-6 puntos de ruido. Con ruido uniforme de fondo salen además grupitos de 3-6 puntos de ruido
+#      que DBSCAN con min_samples chico no puede descartar.
+#  - El mismo árbol da los vecinos a distancia <= eps y las etiquetas salen del grafo con labels_from_graph
+#    (barrido_dbscan.py), que reproduce DBSCAN de sklearn sin volver a indexar los puntos.
+#
+# Uso:
+#   python eps_automatico.py moons [--min-samples 5] [--sin-estandarizar]
+#   (datasets: iris, mall, moons, blobs)
+
+import os
+import argparse
+import numpy as np
+import matplotlib.pyplot as plt
+
+from sklearn.neighbors import KDTree
+from sklearn.preprocessing import StandardScaler
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+
+from clustering import compute_metrics, print_metrics_es, plot_dbscan, load_dataset
+from barrido_dbscan import labels_from_graph
+
+plt.rcParams["figure.dpi"] = 140
+os.makedirs("figs", exist_ok=True)
+
+N_CANDIDATOS = 20
+
+# --------------------------
+# Curva de k-distancias y codo
+# --------------------------
+def k_distances(tree, X, k):
+    """
+    Distancia de cada punto de X a su k-ésimo vecino más cercano (el propio punto cuenta como el primero),
+    en el orden de X. Un punto es núcleo de DBSCAN(eps, min_samples=k) justo cuando ésta es <= eps.
+    """
+    dist, _ = tree.query(X, k=k)
+    return dist[:, -1]
+
+def find_knee(curve):
+    """
+    Índice del codo de una curva creciente: con x e y llevados a [0, 1], el punto con mayor distancia
+    por debajo de la recta que une el primer y el último punto.
+    """
+    y = np.asarray(curve, dtype=float)
+    if len(y) < 3 or y[-1] == y[0]:
+        return len(y) - 1
+    x = np.linspace(0.0, 1.0, len(y))
+    yn = (y - y[0]) / (y[-1] - y[0])
+    return int(np.argmax(x - yn))
+
+def big_cluster_counts(tree, X, kdist, cand, min_samples):
+    """
+    Para cada eps de cand (creciente), cuántos clusters tienen al menos 2*min_samples núcleos y el 1% de
+    los puntos (los grupitos de ruido no cuentan). Una arista entre núcleos existe desde eps = máx(su
+    distancia, k-distancia de sus extremos); ordenadas por ese umbral, cada candidato suma un tramo.
+    """
+    n = len(X)
+    ind, dist = tree.query_radius(X, r=cand[-1], return_distance=True)
+    row = np.repeat(np.arange(n), [len(i) for i in ind])
+    col, dist = np.concatenate(ind), np.concatenate(dist)
+    up = col > row
+    row, col = row[up], col[up]
+    t = np.maximum(dist[up], np.maximum(kdist[row], kdist[col]))
+    order = np.argsort(t, kind="stable")
+    row, col, t = row[order], col[order], t[order]
+
+    min_size = max(2 * min_samples, 0.01 * n)
+    comp, done, counts = np.arange(n), 0, []
+    for e in cand:      # sólo se agregan las aristas nuevas, entre las componentes del paso anterior
+        m = np.searchsorted(t, e, side="right")
+        graph = csr_matrix((np.ones(m - done, dtype=np.int8), (comp[row[done:m]], comp[col[done:m]])), shape=(n, n))
+        comp = connected_components(graph, directed=False)[1][comp]
+        done = m
+        counts.append(int((np.bincount(comp[kdist <= e]) >= min_size).sum()))
+    return counts
+
+def stable_eps(tree, X, kdist, min_samples, n=N_CANDIDATOS):
+    """
+    Busca eps entre el codo de la curva de k-distancias y el codo de su cola. Para n candidatos en ese
+    rango cuenta los clusters relevantes y devuelve el mayor eps de la racha más larga con el mismo número
+    de clusters, siempre que sea >= 2; si no, el eps del codo.
+    Devuelve (eps, curve, lo, hi): la curva ordenada y los índices que limitan la búsqueda.
+    """
+    curve = np.sort(kdist)
+    lo = find_knee(curve)
+    hi = lo + find_knee(curve[lo:])
+    cand = np.unique(curve[np.linspace(lo, hi, n).astype(int)])
+    cand = cand[cand > 0]
+    if len(cand) < 2:
+        return float(curve[lo]), curve, lo, hi
+    counts = big_cluster_counts(tree, X, kdist, cand, min_samples)
+
+    best, start = None, 0
+    for j in range(1, len(counts) + 1):
+        if j == len(counts) or counts[j] != counts[start]:
+            if counts[start] >= 2 and (best is None or j - start > best[1] - best[0]):
+                best = (start, j)
+            start = j
+    if best is None:
+        return float(curve[lo]), curve, lo, hi
+    return float(cand[best[1] - 1]), curve, lo, hi
+
+def plot_k_distance(curve, eps, lo, hi, k, title, filename):
+    """
+    Grafica la curva de k-distancias ordenada, el rango donde se buscó eps y el eps elegido; guarda en figs/.
+    """
+    plt.figure()
+    plt.plot(np.arange(len(curve)), curve, lw=1.2)
+    plt.axvspan(lo, hi, color="tab:gray", alpha=0.15, label="rango de búsqueda")
+    plt.axhline(eps, color="tab:red", ls="--", lw=0.8, label=f"eps = {eps:.4f}")
+    plt.title(title)
+    plt.xlabel("Puntos ordenados por distancia")
+    plt.ylabel(f"Distancia al {k}-ésimo vecino")
+    plt.legend(fontsize=8)
+    plt.tight_layout()
+    outpath = os.path.join("figs", filename)
+    plt.savefig(outpath)
+    plt.close()
+    print(f"Guardada: {outpath}")
+
+# --------------------------
+# eps automático + DBSCAN con el mismo árbol
+# --------------------------
+def estimate_eps(X, min_samples, title=None, filename=None):
+    """
+    eps estable de la curva de k-distancias (k = min_samples), ver stable_eps. Devuelve (eps, tree) para
+    reutilizar el KDTree en el ajuste. Si se da filename, guarda la curva en figs/filename.
+    """
+    X = np.asarray(X, dtype=float)
+    tree = KDTree(X)
+    eps, curve, lo, hi = stable_eps(tree, X, k_distances(tree, X, min_samples), min_samples)
+    if filename is not None:
+        plot_k_distance(curve, eps, lo, hi, min_samples, title or "Curva de k-distancias", filename)
+    return eps, tree
+
+def dbscan_auto_eps(X, min_samples, title=None, filename=None):
+    """
+    Estima eps con la curva de k-distancias (k = min_samples) y ejecuta DBSCAN con ese eps
+    reutilizando el KDTree de la estimación. X ya debe venir estandarizado si se desea.
+    Devuelve (labels, eps). Si se da filename, guarda la curva en figs/filename.
+    """
+    X = np.asarray(X, dtype=float)
+    eps, tree = estimate_eps(X, min_samples, title, filename)
+    ind, dist = tree.query_radius(X, r=eps, return_distance=True)
+    indptr = np.concatenate([[0], np.cumsum([len(i) for i in ind])])
+    labels = labels_from_graph(indptr, np.concatenate(ind), np.concatenate(dist), eps, min_samples)
+    return labels, eps
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("dataset", choices=["iris", "mall", "moons", "blobs"])
+    ap.add_argument("--min-samples", type=int, default=5)
+    ap.add_argument("--sin-estandarizar", action="store_true")
+    a = ap.parse_args()
+
+    name, X = load_dataset(a.dataset)
+    Xp = X if a.sin_estandarizar else StandardScaler().fit_transform(X)
+    labels, eps = dbscan_auto_eps(Xp, a.min_samples, f"{name} — k-distancias (k={a.min_samples})", f"kdist_{a.dataset}.png")
+
+    print(f"\n=== {name} | DBSCAN(eps={eps:.4f} automático, min_samples={a.min_samples}) ===")
+    m = compute_metrics(Xp, labels)
+    print(f"Clusters detectados (sin ruido): {m['n_clusters']}  |  Puntos de ruido: {m['n_noise']}")
+    print_metrics_es(m)
+    plot_dbscan(Xp[:, :2], labels, f"{name} — DBSCAN (eps automático)", f"dbscan_auto_{a.dataset}.png")
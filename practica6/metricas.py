@@ -0,0 +1,107 @@
+# metricas.py
+# Métricas de calidad de clustering para muchos puntos (las usa compute_metrics de clustering.py).
+#  - Silueta exacta por bloques: distancias de un bloque de filas contra todos los puntos, así la memoria
+#    queda acotada (bloque x n) en lugar de n x n.
+#  - Silueta por muestra estratificada: se eligen puntos de cada cluster en proporción a su tamaño, su
+#    silueta se calcula contra TODOS los puntos (sin sesgo) y se reporta un intervalo de confianza.
+#  - Calinski-Harabasz y Davies-Bouldin en una sola pasada que comparte los centroides.
+
+import numpy as np
+from scipy.stats import norm
+
+# --------------------------
+# Preparación
+# --------------------------
+def _grouped(X, labels):
+    """
+    Ordena X por etiqueta. Devuelve (Xs, ls, starts, counts, order): filas agrupadas por cluster,
+    etiquetas compactas 0..k-1, inicio y tamaño de cada grupo y la permutación usada.
+    """
+    uniq, inv = np.unique(labels, return_inverse=True)
+    order = np.argsort(inv, kind="stable")
+    counts = np.bincount(inv, minlength=len(uniq))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    return np.asarray(X, dtype=float)[order], inv[order], starts, counts, order
+
+def _block_rows(n, memory_mb):
+    """Filas por bloque para que una matriz (bloque, n) de float64 ocupe ~memory_mb."""
+    return max(1, int(memory_mb * 2**20 / (8 * max(n, 1))))
+
+def _silhouette_rows(Xs, ls, starts, counts, rows, memory_mb=256):
+    """
+    Silueta de las filas `rows` (índices en Xs) contra todos los puntos de Xs, por bloques.
+    Los puntos de clusters de tamaño 1 tienen silueta 0 (igual que sklearn).
+    """
+    sq = (Xs**2).sum(axis=1)
+    out = np.empty(len(rows))
+    step = _block_rows(len(Xs), memory_mb)
+    for s in range(0, len(rows), step):
+        r = rows[s:s + step]
+        D = np.sqrt(np.maximum(sq[r, None] + sq[None, :] - 2 * Xs[r] @ Xs.T, 0))
+        D[np.arange(len(r)), r] = 0.0
+        sums = np.add.reduceat(D, starts, axis=1)            # (bloque, k) suma de distancias por cluster
+        own = ls[r]
+        a = sums[np.arange(len(r)), own] / np.maximum(counts[own] - 1, 1)
+        mean_other = sums / counts
+        mean_other[np.arange(len(r)), own] = np.inf
+        b = mean_other.min(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sil = (b - a) / np.maximum(a, b)
+        out[s:s + step] = np.where(counts[own] > 1, np.nan_to_num(sil), 0.0)
+    return out
+
+# --------------------------
+# Silueta
+# --------------------------
+def silhouette_exact(X, labels, memory_mb=256):
+    """Silueta media exacta (como silhouette_score) con memoria acotada por memory_mb."""
+    Xs, ls, starts, counts, _ = _grouped(X, labels)
+    return float(_silhouette_rows(Xs, ls, starts, counts, np.arange(len(Xs)), memory_mb).mean())
+
+def silhouette_sampled(X, labels, sample_size=10_000, confidence=0.95, min_per_cluster=30, seed=0, memory_mb=256):
+    """
+    Estima la silueta media con una muestra estratificada por cluster (asignación proporcional, al
+    menos min_per_cluster por cluster). Devuelve (estimación, (inf, sup), tamaño de muestra); el
+    intervalo usa la varianza del estimador estratificado con corrección por población finita.
+    """
+    Xs, ls, starts, counts, _ = _grouped(X, labels)
+    n = len(Xs)
+    rng = np.random.RandomState(seed)
+    take = np.minimum(counts, np.maximum(np.round(sample_size * counts / n).astype(int), min_per_cluster))
+    rows = np.concatenate([starts[h] + rng.choice(counts[h], take[h], replace=False) for h in range(len(counts))])
+    sil = _silhouette_rows(Xs, ls, starts, counts, rows, memory_mb)
+    w = counts / n
+    est, var, s = 0.0, 0.0, 0
+    for h in range(len(counts)):
+        sh = sil[s:s + take[h]]
+        s += take[h]
+        est += w[h] * sh.mean()
+        if take[h] > 1:
+            var += w[h]**2 * sh.var(ddof=1) / take[h] * (1 - take[h] / counts[h])
+    z = norm.ppf(0.5 + confidence / 2)
+    half = z * np.sqrt(var)
+    return float(est), (float(est - half), float(est + half)), int(len(rows))
+
+# --------------------------
+# Calinski-Harabasz y Davies-Bouldin
+# --------------------------
+def ch_db(X, labels):
+    """
+    (calinski_harabasz, davies_bouldin) en una pasada: centroides por bincount, luego la distancia de
+    cada punto a su centroide da la dispersión intra (CH) y la dispersión media por cluster (DB).
+    """
+    X = np.asarray(X, dtype=float)
+    uniq, inv = np.unique(labels, return_inverse=True)
+    n, k = len(X), len(uniq)
+    counts = np.bincount(inv, minlength=k).astype(float)
+    C = np.stack([np.bincount(inv, X[:, j], minlength=k) for j in range(X.shape[1])], axis=1) / counts[:, None]
+    d = np.sqrt(((X - C[inv])**2).sum(axis=1))
+    within = (d**2).sum()
+    between = (counts * ((C - X.mean(axis=0))**2).sum(axis=1)).sum()
+    ch = 1.0 if within == 0 else between * (n - k) / (within * (k - 1))
+    S = np.bincount(inv, d, minlength=k) / counts
+    M = np.sqrt(((C[:, None, :] - C[None, :, :])**2).sum(axis=2))
+    if np.allclose(S, 0) or np.allclose(M, 0):
+        return float(ch), 0.0
+    M[M == 0] = np.inf                       # diagonal (y centroides repetidos) no cuentan
+    return float(ch), float(((S[:, None] + S[None, :]) / M).max(axis=1).mean())